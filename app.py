@@ -1,75 +1,132 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, send_from_directory, abort, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, case, and_, or_, event, insert, update, literal, literal_column, tuple_
+from sqlalchemy.orm import deferred, joinedload, load_only, undefer_group
+from sqlalchemy.ext.hybrid import hybrid_property
 from flask_wtf import FlaskForm
 from wtforms.csrf.core import CSRF
 from wtforms import StringField, TextAreaField, FloatField, SelectField, FileField, DateField, HiddenField, FieldList, FormField
 from wtforms.validators import Optional, ValidationError
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
 from datetime import datetime, timedelta
 import os
 import sys
-import pandas as pd
 import io
 import base64
 import json
+import uuid
 from collections import defaultdict
 import csv
 import time
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4, legal
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.linecharts import HorizontalLineChart
-from reportlab.graphics import renderPDF
-from PIL import Image as PILImage
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+import tempfile
+import functools
 from io import BytesIO
-from pdf_utils import create_pie_chart, create_bar_chart, create_trend_chart, calculate_monthly_breakdown
+from receipt_store import ReceiptStore, ThumbnailCache, THUMBNAIL_SIZES
+from result_cache import ResultCache, create_backend
+from report_cache import ReportCache
+import sqlite_profile
+import jobs
+# pandas, openpyxl, ReportLab, matplotlib and PIL are imported only by the code that
+# needs them (imports, Excel export, reports, receipt thumbnails), so workers serving
+# ordinary pages never load them; see startup_benchmark.py
 
-# Simple in-memory cache
-CACHE = {}
-CACHE_TIMEOUT = 300  # 5 minutes
+app = Flask(__name__)
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'pcs-showdown-secret-key-2024')
+# Use absolute path for database
+basedir = os.path.abspath(os.path.dirname(__file__))
+# Database, receipts, caches and job files; PCS_DATA_DIR moves them (the test suite uses a temp dir)
+datadir = os.environ.get('PCS_DATA_DIR') or os.path.join(basedir, 'data')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(datadir, "pcs_tracker.db")}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['RECEIPT_FOLDER'] = os.path.join(datadir, 'receipts')
+app.config['RECEIPT_THUMBNAIL_FOLDER'] = os.path.join(datadir, 'receipt_thumbs')
+app.config['RECEIPT_THUMBNAIL_MAX_BYTES'] = int(os.environ.get('RECEIPT_THUMBNAIL_MAX_BYTES', 256 * 1024 * 1024))
+app.config['RECEIPT_THUMBNAIL_EAGER'] = os.environ.get('RECEIPT_THUMBNAIL_EAGER', 'true').lower() == 'true'
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'sqlite')  # sqlite, redis or memory
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['CACHE_TIMEOUT'] = int(os.environ.get('CACHE_TIMEOUT', 300))  # 5 minutes
+app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+app.config['CACHE_MAX_BYTES'] = int(os.environ.get('CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 32MB
+# Pragmas applied to every SQLite connection; override with SQLITE_<PRAGMA> (see sqlite_profile.py)
+app.config['SQLITE_PRAGMAS'] = sqlite_profile.pragmas_from_env(os.environ)
+app.config['SQLITE_WRITE_RETRIES'] = int(os.environ.get('SQLITE_WRITE_RETRIES', 3))
+app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', 2000))  # rows per insert transaction
+app.config['JOB_FOLDER'] = os.path.join(datadir, 'jobs')  # spooled uploads of background jobs
+app.config['IMPORT_WORKERS'] = int(os.environ.get('IMPORT_WORKERS', 1))  # import threads per gunicorn worker
+app.config['REPORT_FOLDER'] = os.path.join(datadir, 'reports')  # rendered PDF reports (report_cache.py)
+app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 1))  # report processes per gunicorn worker
+app.config['REPORT_CACHE_MAX_BYTES'] = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # 256MB
+app.config['CHART_CACHE_FOLDER'] = os.path.join(datadir, 'chart_cache')  # rendered chart PNGs (pdf_utils.py)
+app.config['CHART_CACHE_MEMORY_BYTES'] = int(os.environ.get('CHART_CACHE_MEMORY_BYTES', 8 * 1024 * 1024))  # per process
+app.config['CHART_CACHE_MAX_BYTES'] = int(os.environ.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # on disk
+app.config['REPORT_CHART_BACKEND'] = os.environ.get('REPORT_CHART_BACKEND', 'matplotlib')  # default chart style: matplotlib or vector
+# Threads per report process that render chart cache misses concurrently; 1 renders them inline
+app.config['REPORT_CHART_THREADS'] = int(os.environ.get('REPORT_CHART_THREADS', min(3, os.cpu_count() or 1)))
+
+db = SQLAlchemy(app)
+with app.app_context():
+    sqlite_profile.install(db.engine, app.config['SQLITE_PRAGMAS'])
+
+def _rewind_uploads():
+    for _, upload in request.files.items(multi=True):
+        upload.stream.seek(0)
+
+# Wraps routes that write, re-running them if SQLite stays locked past busy_timeout
+retry_write = sqlite_profile.retry_on_locked(
+    rollback=lambda: db.session.rollback(),
+    attempts=app.config['SQLITE_WRITE_RETRIES'],
+    before_retry=_rewind_uploads
+)
+receipt_store = ReceiptStore(app.config['RECEIPT_FOLDER'])
+thumbnail_cache = ThumbnailCache(app.config['RECEIPT_THUMBNAIL_FOLDER'], app.config['RECEIPT_THUMBNAIL_MAX_BYTES'])
+
+# Imports run here, outside the request that uploaded the file
+import_executor = jobs.JobExecutor(app.config['IMPORT_WORKERS'], name='import')
+# Reports are CPU bound (charts, layout), so they get their own processes
+report_executor = jobs.JobExecutor(app.config['REPORT_WORKERS'], name='report', processes=True)
+# Only ever started inside report processes; threads, so no processes are nested under the report pool
+chart_executor = jobs.JobExecutor(app.config['REPORT_CHART_THREADS'], name='chart')
+report_cache = ReportCache(app.config['REPORT_FOLDER'], app.config['REPORT_CACHE_MAX_BYTES'])
+
+def shutdown_executors(wait=True):
+    """Stop this worker's job pools and their processes; gunicorn calls this from worker_exit"""
+    for executor in (import_executor, report_executor, chart_executor):
+        executor.shutdown(wait=wait)
+
+@functools.lru_cache(maxsize=None)
+def load_pdf_utils():
+    """Import pdf_utils (and with it ReportLab) on the first report rendered in this process"""
+    import pdf_utils
+    pdf_utils.configure_chart_cache(app.config['CHART_CACHE_FOLDER'], app.config['CHART_CACHE_MEMORY_BYTES'],
+                                    app.config['CHART_CACHE_MAX_BYTES'])
+    return pdf_utils
+
+# Result cache shared by all workers; see result_cache.py
+result_cache = ResultCache(
+    create_backend(app.config['CACHE_BACKEND'], datadir, app.config['CACHE_REDIS_URL'],
+                   app.config['CACHE_MAX_ENTRIES'], app.config['CACHE_MAX_BYTES']),
+    app.config['CACHE_TIMEOUT']
+)
 
 def get_cache_key(endpoint, **kwargs):
-    """Generate a cache key from endpoint and parameters"""
+    """Generate a cache key from endpoint, parameters and the current data generation"""
     params_str = '&'.join([f"{k}={v}" for k, v in sorted(kwargs.items())])
-    return f"{endpoint}:{params_str}"
+    return result_cache.make_key(endpoint, params_str)
 
 def get_from_cache(key):
     """Get value from cache if not expired"""
-    if key in CACHE:
-        timestamp, value = CACHE[key]
-        if time.time() - timestamp < CACHE_TIMEOUT:
-            return value
-        else:
-            del CACHE[key]
-    return None
+    return result_cache.get(key)
 
 def set_cache(key, value):
-    """Set value in cache with current timestamp"""
-    CACHE[key] = (time.time(), value)
+    """Store value in the shared cache"""
+    result_cache.set(key, value)
 
 def clear_cache():
-    """Clear all cached data"""
-    CACHE.clear()
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'pcs-showdown-secret-key-2024')
-# Use absolute path for database
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "data", "pcs_tracker.db")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
-
-db = SQLAlchemy(app)
+    """Invalidate cached data in every worker"""
+    result_cache.invalidate()
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'webp'}
 
@@ -187,28 +244,48 @@ class HomepageConfig(db.Model):
 class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200))
-    description = db.Column(db.Text)
+    # Long text columns are deferred; load them with undefer_group('details')
+    description = deferred(db.Column(db.Text), group='details')
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
     cost = db.Column(db.Float, default=0.0)
     payment_method_id = db.Column(db.Integer, db.ForeignKey('payment_method.id'))
     date = db.Column(db.Date, default=datetime.utcnow)
-    receipt_image = db.Column(db.LargeBinary)
+    receipt_hash = db.Column(db.String(64))  # SHA-256 of the file in receipt_store
+    receipt_size = db.Column(db.Integer)
     receipt_filename = db.Column(db.String(200))
     receipt_mimetype = db.Column(db.String(100))
     location = db.Column(db.String(200))
     vendor = db.Column(db.String(200))
-    notes = db.Column(db.Text)
+    notes = deferred(db.Column(db.Text), group='details')
     tags = db.Column(db.String(500))
-    custom_data = db.Column(db.Text, default='{}')
+    custom_data = deferred(db.Column(db.Text, default='{}'), group='details')
     is_reimbursable = db.Column(db.String(10), default='no', nullable=False)
     reimbursement_status = db.Column(db.String(20), default='none')  # none, pending, approved, received
-    reimbursement_notes = db.Column(db.Text)
+    reimbursement_notes = deferred(db.Column(db.Text), group='details')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     category = db.relationship('Category', backref='expenses')
     payment_method = db.relationship('PaymentMethod', backref='expenses')
     
+    @hybrid_property
+    def has_receipt(self):
+        return self.receipt_hash is not None
+    
+    @has_receipt.expression
+    def has_receipt(cls):
+        return cls.receipt_hash.isnot(None)
+    
+    @property
+    def receipt_version(self):
+        """Short content version used to make receipt URLs cacheable"""
+        return self.receipt_hash[:16] if self.receipt_hash else None
+    
+    @property
+    def has_receipt_preview(self):
+        """Whether a thumbnail can be rendered (older uploads may lack a mimetype)"""
+        return self.has_receipt and (self.receipt_mimetype or 'image/jpeg').startswith('image/')
+    
     def get_custom_data(self):
         try:
             return json.loads(self.custom_data) if self.custom_data else {}
@@ -217,6 +294,318 @@ class Expense(db.Model):
     
     def set_custom_data(self, data):
         self.custom_data = json.dumps(data)
+    
+    def attach_receipt(self, file):
+        """Store an uploaded file and point this expense at it. Returns the replaced digest."""
+        previous_hash = self.receipt_hash
+        self.receipt_hash, self.receipt_size = receipt_store.put_stream(file.stream)
+        self.receipt_filename = secure_filename(file.filename)
+        self.receipt_mimetype = file.content_type
+        if app.config['RECEIPT_THUMBNAIL_EAGER'] and self.has_receipt_preview:
+            render_receipt_thumbnails(self.receipt_hash)
+        return previous_hash if previous_hash != self.receipt_hash else None
+
+class ExpenseDailyRollup(db.Model):
+    """Per-day expense count and total for each category/payment/reimbursement combination.
+
+    Maintained by SQLite triggers on the expense table (see ROLLUP_TRIGGERS),
+    so every write path updates it in the same transaction.
+    """
+    __tablename__ = 'expense_daily_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date)
+    category_id = db.Column(db.Integer)
+    payment_method_id = db.Column(db.Integer)
+    is_reimbursable = db.Column(db.String(10))
+    reimbursement_status = db.Column(db.String(20))
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        db.Index('ix_expense_daily_rollup_key', 'date', 'category_id', 'payment_method_id',
+                 'is_reimbursable', 'reimbursement_status'),
+    )
+
+ROLLUP_KEY_COLUMNS = ('date', 'category_id', 'payment_method_id', 'is_reimbursable', 'reimbursement_status')
+
+def _rollup_trigger_body(row, sign):
+    """SQL that adds (sign=1) or removes (sign=-1) the OLD/NEW expense row from the rollup"""
+    key_columns = ', '.join(ROLLUP_KEY_COLUMNS)
+    match = ' AND '.join(f"{column} IS {row}.{column}" for column in ROLLUP_KEY_COLUMNS)
+    op = '+' if sign > 0 else '-'
+    statements = []
+    if sign > 0:
+        statements.append(
+            f"INSERT INTO expense_daily_rollup ({key_columns}, expense_count, total_cost) "
+            f"SELECT {', '.join(f'{row}.{column}' for column in ROLLUP_KEY_COLUMNS)}, 0, 0.0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM expense_daily_rollup WHERE {match});"
+        )
+    statements.append(
+        f"UPDATE expense_daily_rollup SET expense_count = expense_count {op} 1, "
+        f"total_cost = total_cost {op} COALESCE({row}.cost, 0) WHERE {match};"
+    )
+    if sign < 0:
+        statements.append(f"DELETE FROM expense_daily_rollup WHERE {match} AND expense_count <= 0;")
+    return '\n'.join(statements)
+
+ROLLUP_TRIGGER_NAMES = ('expense_rollup_insert', 'expense_rollup_delete', 'expense_rollup_update')
+
+ROLLUP_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS expense_rollup_insert AFTER INSERT ON expense BEGIN\n"
+    f"{_rollup_trigger_body('NEW', 1)}\nEND",
+    f"CREATE TRIGGER IF NOT EXISTS expense_rollup_delete AFTER DELETE ON expense BEGIN\n"
+    f"{_rollup_trigger_body('OLD', -1)}\nEND",
+    f"CREATE TRIGGER IF NOT EXISTS expense_rollup_update AFTER UPDATE OF cost, {', '.join(ROLLUP_KEY_COLUMNS)} ON expense BEGIN\n"
+    f"{_rollup_trigger_body('OLD', -1)}\n{_rollup_trigger_body('NEW', 1)}\nEND",
+]
+
+ROLLUP_REBUILD = [
+    "DELETE FROM expense_daily_rollup",
+    f"INSERT INTO expense_daily_rollup ({', '.join(ROLLUP_KEY_COLUMNS)}, expense_count, total_cost) "
+    f"SELECT {', '.join(ROLLUP_KEY_COLUMNS)}, COUNT(*), SUM(COALESCE(cost, 0)) "
+    f"FROM expense GROUP BY {', '.join(ROLLUP_KEY_COLUMNS)}",
+]
+
+def rebuild_expense_rollup(connection):
+    """(Re)create the rollup triggers and recompute the rollup from the expense table"""
+    for statement in ROLLUP_TRIGGERS + ROLLUP_REBUILD:
+        connection.exec_driver_sql(statement)
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_expense_rollup(target, connection, tables=(), **kw):
+    # Runs after create_all(), once both the expense and the rollup table exist;
+    # on an existing database this backfills the newly created rollup table
+    if any(table.name == 'expense_daily_rollup' for table in tables):
+        rebuild_expense_rollup(connection)
+
+def ensure_expense_rollup():
+    """Recreate missing rollup triggers and recompute the rollup.
+
+    Rebuilding the expense table (a migration, or a rollback that restores it)
+    drops its triggers while the rollup table stays, so after_create never
+    fires again; without this check the rollup would silently go stale.
+    """
+    with app.app_context():
+        with db.engine.begin() as connection:
+            present = {name for name, in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'expense'")}
+            missing = [name for name in ROLLUP_TRIGGER_NAMES if name not in present]
+            if missing:
+                print(f"Worker {os.getpid()}: ⚠ Rollup triggers missing ({', '.join(missing)}), "
+                      f"recreating them and rebuilding the rollup")
+                rebuild_expense_rollup(connection)
+
+class BackgroundJob(db.Model):
+    """A long-running import (or report) executed outside the request; see jobs.py"""
+    __tablename__ = 'background_job'
+    
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind = db.Column(db.String(20), nullable=False)  # import, report
+    status = db.Column(db.String(20), nullable=False, default=jobs.QUEUED)  # queued, running, done, failed
+    filename = db.Column(db.String(200))
+    input_path = db.Column(db.String(500))  # spooled upload, removed when the job finishes
+    params = db.Column(db.Text, default='{}')  # JSON with the options a report is rendered with
+    worker = db.Column(db.String(100))  # host:pid running the job
+    bytes_total = db.Column(db.Integer, default=0)
+    bytes_read = db.Column(db.Integer, default=0)
+    rows_parsed = db.Column(db.Integer, default=0)
+    rows_inserted = db.Column(db.Integer, default=0)
+    rows_rejected = db.Column(db.Integer, default=0)
+    result = db.Column(db.Text, default='{}')  # JSON with the import error report or the rendered report file
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def get_params(self):
+        try:
+            return json.loads(self.params) if self.params else {}
+        except:
+            return {}
+    
+    def set_params(self, data):
+        self.params = json.dumps(data)
+    
+    def get_result(self):
+        try:
+            return json.loads(self.result) if self.result else {}
+        except:
+            return {}
+    
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'status_url': url_for('api_job', job_id=self.id),
+            'filename': self.filename,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.kind == 'report':
+            if self.status == jobs.DONE:
+                data['download_url'] = url_for('download_report', job_id=self.id)
+        else:
+            data.update({
+                'progress': round(100.0 * self.bytes_read / self.bytes_total, 1) if self.bytes_total else 0.0,
+                'rows_parsed': self.rows_parsed or 0,
+                'rows_inserted': self.rows_inserted or 0,
+                'rows_rejected': self.rows_rejected or 0,
+            })
+            if self.status in jobs.FINISHED_STATES:
+                data.update(self.get_result())
+        return data
+
+def render_receipt_thumbnails(digest):
+    """Pre-render every preview size so the first hover does not pay for it"""
+    for size in THUMBNAIL_SIZES:
+        try:
+            thumbnail_cache.get(digest, size, receipt_store.path(digest))
+        except Exception as e:
+            print(f"Warning: Could not render receipt thumbnail: {e}")
+            break
+
+# Read model for list and aggregate views: light columns only, with category
+# and payment method joined in the same query instead of lazy-loaded per row
+EXPENSE_SUMMARY_COLUMNS = (
+    Expense.id, Expense.title, Expense.cost, Expense.date,
+    Expense.category_id, Expense.payment_method_id,
+    Expense.receipt_hash, Expense.receipt_size, Expense.receipt_mimetype,
+    Expense.location, Expense.vendor, Expense.tags,
+    Expense.is_reimbursable, Expense.reimbursement_status,
+    Expense.created_at, Expense.updated_at
+)
+
+def expense_summary_query(with_details=False):
+    """Expense query for listings; pass with_details=True to include long text fields"""
+    query = Expense.query.options(
+        load_only(*EXPENSE_SUMMARY_COLUMNS),
+        joinedload(Expense.category),
+        joinedload(Expense.payment_method)
+    )
+    if with_details:
+        query = query.options(undefer_group('details'))
+    return query
+
+def expense_totals(start_date=None):
+    """Return (total cost, count) of expenses dated on or after start_date, read from the rollup"""
+    total, count = db.session.query(
+        func.coalesce(func.sum(ExpenseDailyRollup.total_cost), 0.0),
+        func.coalesce(func.sum(ExpenseDailyRollup.expense_count), 0)
+    ).filter(*expense_filter_criteria(start_date=start_date, source=ExpenseDailyRollup)).one()
+    return total, count
+
+PERIOD_DAYS = {'week': 7, 'month': 30, 'quarter': 90, 'year': 365}
+REIMBURSABLE_VALUES = ['yes', 'maybe']
+
+def reimbursable_criterion(source=Expense):
+    """is_reimbursable IN ('yes', 'maybe'), rendered with literal values so that
+    SQLite can match it against the partial index ix_expense_reimbursable"""
+    return source.is_reimbursable.in_([literal_column(f"'{value}'") for value in REIMBURSABLE_VALUES])
+
+def period_start_date(period):
+    """Start of a dashboard period ('week', 'month', ...); unknown periods mean a month"""
+    return datetime.today() - timedelta(days=PERIOD_DAYS.get(period, 30))
+
+def summary_source(min_amount=None, max_amount=None):
+    """Pick the table to aggregate: the rollup answers every filter except amount bounds"""
+    if min_amount is not None or max_amount is not None:
+        return Expense
+    return ExpenseDailyRollup
+
+def expense_filter_criteria(start_date=None, categories=None, payment_methods=None, min_amount=None,
+                            max_amount=None, reimbursable_only=False, reimbursement_status=None,
+                            end_date=None, source=Expense):
+    """Build the SQL filter list shared by the dashboard, widget and report endpoints"""
+    criteria = []
+    if start_date is not None:
+        criteria.append(source.date >= start_date)
+    if end_date is not None:
+        criteria.append(source.date <= end_date)
+    if categories:
+        criteria.append(source.category_id.in_(categories))
+    if payment_methods:
+        criteria.append(source.payment_method_id.in_(payment_methods))
+    if min_amount is not None:
+        criteria.append(Expense.cost >= min_amount)
+    if max_amount is not None:
+        criteria.append(Expense.cost <= max_amount)
+    if reimbursable_only:
+        criteria.append(reimbursable_criterion(source))
+    if reimbursement_status and reimbursement_status != 'all':
+        criteria.append(source.reimbursement_status == reimbursement_status)
+    return criteria
+
+def summarize_expenses(*criteria, source=Expense):
+    """Aggregate matching expenses in a single grouped query.
+
+    Rows of ``source`` (Expense or ExpenseDailyRollup) are grouped by
+    (date, category, payment method) with the reimbursement sums computed
+    as conditional aggregates, then folded into per-category,
+    per-payment-method and per-day totals.
+    """
+    if source is ExpenseDailyRollup:
+        weight, cost = ExpenseDailyRollup.expense_count, ExpenseDailyRollup.total_cost
+    else:
+        weight, cost = literal(1), func.coalesce(Expense.cost, 0.0)
+    is_reimbursable = source.is_reimbursable.in_(REIMBURSABLE_VALUES)
+    is_pending = and_(is_reimbursable, source.reimbursement_status == 'pending')
+    
+    def reimbursable_sum(status=None):
+        condition = is_reimbursable if status is None else and_(is_reimbursable, source.reimbursement_status == status)
+        return func.sum(case((condition, cost), else_=0.0))
+    
+    rows = db.session.query(
+        source.date,
+        Category.name,
+        PaymentMethod.name,
+        func.sum(weight),
+        func.sum(cost),
+        reimbursable_sum(),
+        reimbursable_sum('pending'),
+        reimbursable_sum('approved'),
+        reimbursable_sum('received'),
+        func.sum(case((is_pending, weight), else_=0))
+    ).select_from(source).outerjoin(
+        Category, source.category_id == Category.id
+    ).outerjoin(
+        PaymentMethod, source.payment_method_id == PaymentMethod.id
+    ).filter(*criteria).group_by(
+        source.date, Category.name, PaymentMethod.name
+    ).all()
+    
+    summary = {
+        'category_totals': defaultdict(float),
+        'payment_totals': defaultdict(float),
+        'daily_totals': defaultdict(float),
+        'reimbursable': 0.0,
+        'pending': 0.0,
+        'approved': 0.0,
+        'received': 0.0,
+        'pending_count': 0,
+        'total': 0.0,
+        'count': 0
+    }
+    for date, category_name, payment_name, count, total, reimbursable, pending, approved, received, pending_count in rows:
+        summary['category_totals'][category_name or 'Uncategorized'] += total
+        summary['payment_totals'][payment_name or 'Unknown'] += total
+        summary['daily_totals'][date.strftime('%Y-%m-%d') if date else 'Unknown'] += total
+        summary['reimbursable'] += reimbursable
+        summary['pending'] += pending
+        summary['approved'] += approved
+        summary['received'] += received
+        summary['pending_count'] += pending_count
+        summary['total'] += total
+        summary['count'] += count
+    return summary
+
+def release_receipt(digest):
+    """Delete a stored receipt once no expense references it any more"""
+    if digest and not Expense.query.filter_by(receipt_hash=digest).first():
+        receipt_store.delete(digest)
+        thumbnail_cache.delete(digest)
 
 # Forms
 class BaseForm(FlaskForm):
@@ -343,16 +732,15 @@ def currency_filter(value):
 @app.context_processor
 def inject_helper_functions():
     def get_recent_expenses(limit=5):
-        return Expense.query.order_by(Expense.date.desc(), Expense.created_at.desc()).limit(limit).all()
+        return expense_summary_query().order_by(Expense.date.desc(), Expense.created_at.desc()).limit(limit).all()
     
     def get_monthly_total():
         today = datetime.today()
         start_of_month = today.replace(day=1)
-        expenses = Expense.query.filter(Expense.date >= start_of_month).all()
-        return sum(e.cost or 0 for e in expenses)
+        return expense_totals(start_of_month)[0]
     
     def get_expense_count():
-        return Expense.query.count()
+        return expense_totals()[1]
     
     return dict(
         get_recent_expenses=get_recent_expenses,
@@ -374,13 +762,10 @@ def index():
     today = datetime.today()
     month_start = today.replace(day=1)
     
-    all_expenses = Expense.query.all()
-    month_expenses_query = Expense.query.filter(Expense.date >= month_start).all()
-    recent_expenses = Expense.query.order_by(Expense.date.desc(), Expense.created_at.desc()).limit(5).all()
+    total_expenses, expense_count = expense_totals()
+    month_expenses = expense_totals(month_start)[0]
+    recent_expenses = expense_summary_query().order_by(Expense.date.desc(), Expense.created_at.desc()).limit(5).all()
     
-    total_expenses = sum(e.cost or 0 for e in all_expenses)
-    month_expenses = sum(e.cost or 0 for e in month_expenses_query)
-    expense_count = len(all_expenses)
     category_count = Category.query.count()
     
     return render_template('index.html', 
@@ -391,21 +776,180 @@ def index():
                          category_count=category_count,
                          recent_expenses=recent_expenses)
 
+EXPENSE_PAGE_SIZE = 50
+
+# Keyset orderings of the expense list. Each is a tuple of NULL-safe sort keys
+# ending in the primary key, so the key values of a page's last row mark the
+# exact position where the next page starts. The defaults are literals rather
+# than bound parameters so the date keys match the ix_expense_list_order index.
+_date_keys = (
+    func.coalesce(Expense.date, literal_column("''"), type_=db.String),
+    func.coalesce(Expense.created_at, literal_column("''"), type_=db.String),
+    Expense.id
+)
+_amount_keys = (func.coalesce(Expense.cost, literal_column('0.0'), type_=db.Float), Expense.id)
+_title_keys = (func.coalesce(Expense.title, literal_column("''"), type_=db.String), Expense.id)
+EXPENSE_SORTS = {
+    'date_desc': (_date_keys, True),
+    'date_asc': (_date_keys, False),
+    'amount_desc': (_amount_keys, True),
+    'amount_asc': (_amount_keys, False),
+    'title_asc': (_title_keys, False),
+}
+
+# Columns matched by the expense list text search
+EXPENSE_SEARCH_COLUMNS = (Expense.title, Expense.vendor, Expense.location, Expense.tags,
+                          Expense.description, Expense.notes)
+
+def _parse_date_arg(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def expense_list_filters(args):
+    """Parse the expense list filters from query args"""
+    sort = args.get('sort', 'date_desc')
+    return dict(
+        q=args.get('q', '').strip(),
+        category=args.get('category', type=int),
+        payment=args.get('payment', type=int),
+        reimbursable=args.get('reimbursable', ''),
+        start_date=args.get('start_date', type=_parse_date_arg),
+        end_date=args.get('end_date', type=_parse_date_arg),
+        sort=sort if sort in EXPENSE_SORTS else 'date_desc'
+    )
+
+def expense_list_criteria(filters):
+    """SQL criteria for parsed expense list filters"""
+    reimbursable = filters['reimbursable']
+    criteria = expense_filter_criteria(
+        start_date=filters['start_date'],
+        end_date=filters['end_date'],
+        categories=[filters['category']] if filters['category'] else None,
+        payment_methods=[filters['payment']] if filters['payment'] else None,
+        reimbursable_only=reimbursable in ('pending', 'approved', 'received'),
+        reimbursement_status=reimbursable if reimbursable in ('pending', 'approved', 'received') else None
+    )
+    if reimbursable in REIMBURSABLE_VALUES:
+        criteria.append(Expense.is_reimbursable == reimbursable)
+    elif reimbursable == 'no':
+        criteria.append(or_(Expense.is_reimbursable.is_(None), Expense.is_reimbursable.notin_(REIMBURSABLE_VALUES)))
+    if filters['q']:
+        criteria.append(or_(*(column.icontains(filters['q'], autoescape=True) for column in EXPENSE_SEARCH_COLUMNS)))
+    return criteria
+
+def encode_expense_cursor(key_values):
+    return base64.urlsafe_b64encode(json.dumps(list(key_values)).encode()).decode()
+
+def _cursor_value_types(key):
+    """JSON types a cursor value may have for a sort key; the keys are coalesced, so never None"""
+    python_type = key.type.python_type
+    if python_type is float:
+        return (int, float)
+    return (python_type,)
+
+def decode_expense_cursor(cursor, sort):
+    """Decode a page cursor, aborting with 400 if it is malformed or from another sort order"""
+    try:
+        key_values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        abort(400)
+    keys = EXPENSE_SORTS[sort][0]
+    if not isinstance(key_values, list) or len(key_values) != len(keys):
+        abort(400)
+    for key, value in zip(keys, key_values):
+        # bool is an int subclass, but never a valid key value
+        if isinstance(value, bool) or not isinstance(value, _cursor_value_types(key)):
+            abort(400)
+    return key_values
+
+# Long text columns shown in the expense list, cut to this many characters in SQL
+# (one more than displayed, so the template can tell whether to add an ellipsis)
+EXPENSE_ROW_SNIPPETS = {'description': 50, 'notes': 30, 'reimbursement_notes': 20}
+
+def expense_page(filters, criteria, cursor=None, page_size=EXPENSE_PAGE_SIZE):
+    """Return (expenses, snippets, next_cursor) for one keyset page of the expense list.
+
+    The long text columns stay deferred; ``snippets`` maps each expense id to
+    the leading characters of its description and notes, which is all the
+    list shows. The preview and edit pages load the full text.
+    """
+    keys, descending = EXPENSE_SORTS[filters['sort']]
+    snippet_columns = [func.substr(getattr(Expense, name), 1, length + 1)
+                       for name, length in EXPENSE_ROW_SNIPPETS.items()]
+    query = expense_summary_query().add_columns(*snippet_columns, *keys).filter(*criteria)
+    if cursor is not None:
+        # The redundant bound on the leading key lets SQLite seek the index instead of scanning it
+        if descending:
+            query = query.filter(keys[0] <= cursor[0], tuple_(*keys) < tuple_(*cursor))
+        else:
+            query = query.filter(keys[0] >= cursor[0], tuple_(*keys) > tuple_(*cursor))
+    rows = query.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(page_size + 1).all()
+    
+    next_cursor = encode_expense_cursor(rows[page_size - 1][-len(keys):]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+    snippets = {row[0].id: dict(zip(EXPENSE_ROW_SNIPPETS, row[1:1 + len(EXPENSE_ROW_SNIPPETS)])) for row in rows}
+    return [row[0] for row in rows], snippets, next_cursor
+
+def expense_list_stats(criteria):
+    """Totals shown above the expense list for the current filters"""
+    total, count, with_receipts = db.session.query(
+        func.coalesce(func.sum(Expense.cost), 0.0),
+        func.count(Expense.id),
+        func.count(Expense.receipt_hash)
+    ).filter(*criteria).one()
+    return {
+        'total': total,
+        'count': count,
+        'average': total / count if count else 0,
+        'with_receipts': with_receipts
+    }
+
 @app.route('/expenses')
 def expenses():
     settings = Settings.query.first()
-    expenses_list = Expense.query.order_by(Expense.date.desc(), Expense.created_at.desc()).all()
-    total_cost = sum(e.cost or 0 for e in expenses_list)
-    categories = Category.query.all()
-    payment_methods = PaymentMethod.query.all()
+    filters = expense_list_filters(request.args)
+    criteria = expense_list_criteria(filters)
+    expenses_list, snippets, next_cursor = expense_page(filters, criteria)
+    categories = Category.query.order_by(Category.name).all()
+    payment_methods = PaymentMethod.query.order_by(PaymentMethod.name).all()
     return render_template('expenses.html', 
                          expenses=expenses_list, 
-                         total_cost=total_cost, 
+                         snippets=snippets,
+                         next_cursor=next_cursor,
+                         stats=expense_list_stats(criteria),
+                         filters=filters,
+                         has_expenses=db.session.query(Expense.id).first() is not None,
                          settings=settings,
                          categories=categories,
                          payment_methods=payment_methods)
 
+@app.route('/api/expenses')
+def api_expenses():
+    """One page of the expense list as rendered table rows.
+
+    Pass the ``next_cursor`` of the previous page as ``cursor`` to continue;
+    the first page (no cursor) also carries the totals for the filters.
+    """
+    filters = expense_list_filters(request.args)
+    cursor = request.args.get('cursor')
+    cursor = decode_expense_cursor(cursor, filters['sort']) if cursor else None
+    criteria = expense_list_criteria(filters)
+    expenses_list, snippets, next_cursor = expense_page(filters, criteria, cursor)
+    result = {
+        'html': render_template('expense_rows.html', expenses=expenses_list, snippets=snippets),
+        'next_cursor': next_cursor
+    }
+    if cursor is None:
+        stats = expense_list_stats(criteria)
+        result['stats'] = {
+            'total': currency_filter(stats['total']),
+            'count': stats['count'],
+            'average': currency_filter(stats['average']),
+            'with_receipts': stats['with_receipts']
+        }
+    return jsonify(result)
+
 @app.route('/expense/new', methods=['GET', 'POST'])
+@retry_write
 def new_expense():
     settings = Settings.query.first()
     form = ExpenseForm()
@@ -438,11 +982,7 @@ def new_expense():
         if form.receipt.data:
             file = form.receipt.data
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_data = file.read()
-                expense.receipt_image = file_data
-                expense.receipt_filename = filename
-                expense.receipt_mimetype = file.content_type
+                expense.attach_receipt(file)
         
         db.session.add(expense)
         db.session.commit()
@@ -453,6 +993,7 @@ def new_expense():
     return render_template('expense_form.html', form=form, settings=settings, is_edit=False)
 
 @app.route('/expense/<int:id>/edit', methods=['GET', 'POST'])
+@retry_write
 def edit_expense(id):
     settings = Settings.query.first()
     expense = Expense.query.get_or_404(id)
@@ -483,16 +1024,14 @@ def edit_expense(id):
         expense.updated_at = datetime.utcnow()
         
         # Handle file upload
+        replaced_receipt = None
         if form.receipt.data:
             file = form.receipt.data
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_data = file.read()
-                expense.receipt_image = file_data
-                expense.receipt_filename = filename
-                expense.receipt_mimetype = file.content_type
+                replaced_receipt = expense.attach_receipt(file)
         
         db.session.commit()
+        release_receipt(replaced_receipt)
         clear_cache()  # Invalidate cache after updating expense
         flash('Expense updated successfully!', 'success')
         return redirect(url_for('expenses'))
@@ -500,30 +1039,75 @@ def edit_expense(id):
     return render_template('expense_form.html', form=form, expense=expense, settings=settings, is_edit=True)
 
 @app.route('/expense/<int:id>/delete', methods=['POST'])
+@retry_write
 def delete_expense(id):
     expense = Expense.query.get_or_404(id)
+    receipt_hash = expense.receipt_hash
     db.session.delete(expense)
     db.session.commit()
+    release_receipt(receipt_hash)
     clear_cache()  # Invalidate cache after deleting expense
     flash('Expense deleted successfully!', 'success')
     return redirect(url_for('expenses'))
 
+# Receipt responses on a URL carrying the current ?v= version never change, so
+# browsers and nginx may keep them for a year; unversioned URLs revalidate.
+RECEIPT_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RECEIPT_COLUMNS = (Expense.id, Expense.receipt_hash, Expense.receipt_filename, Expense.receipt_mimetype, Expense.updated_at)
+
+def send_receipt_file(expense, path, mimetype, etag, download_name=None):
+    """Send a receipt file with a strong ETag, Last-Modified and HTTP Range support"""
+    immutable = request.args.get('v') == expense.receipt_version
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=False,
+        download_name=download_name,
+        etag=etag,
+        last_modified=expense.updated_at,
+        conditional=True,
+        max_age=RECEIPT_IMMUTABLE_MAX_AGE if immutable else None
+    )
+    # Advertise range support on full responses too so PDF viewers fetch in parts
+    response.headers['Accept-Ranges'] = 'bytes'
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
 @app.route('/expense/<int:id>/receipt')
 def view_receipt(id):
-    expense = Expense.query.get_or_404(id)
-    if expense.receipt_image:
-        return send_file(
-            io.BytesIO(expense.receipt_image),
+    expense = Expense.query.options(load_only(*RECEIPT_COLUMNS)).get_or_404(id)
+    if expense.receipt_hash and receipt_store.exists(expense.receipt_hash):
+        return send_receipt_file(
+            expense,
+            receipt_store.path(expense.receipt_hash),
             mimetype=expense.receipt_mimetype or 'image/jpeg',
-            as_attachment=False,
+            etag=expense.receipt_hash,
             download_name=expense.receipt_filename or 'receipt.jpg'
         )
     flash('No receipt found for this expense', 'warning')
     return redirect(url_for('expenses'))
 
+@app.route('/expense/<int:id>/receipt/thumb')
+def view_receipt_thumbnail(id):
+    expense = Expense.query.options(load_only(*RECEIPT_COLUMNS)).get_or_404(id)
+    size = request.args.get('size', THUMBNAIL_SIZES[0], type=int)
+    if size not in THUMBNAIL_SIZES:
+        abort(400)
+    if not expense.has_receipt_preview or not receipt_store.exists(expense.receipt_hash):
+        abort(404)
+    
+    try:
+        thumbnail_path = thumbnail_cache.get(expense.receipt_hash, size, receipt_store.path(expense.receipt_hash))
+    except Exception as e:
+        print(f"Warning: Could not render thumbnail for expense {id}: {e}")
+        abort(404)
+    
+    return send_receipt_file(expense, thumbnail_path, mimetype='image/webp', etag=f"{expense.receipt_hash}-{size}")
+
 @app.route('/api/expense/<int:id>')
 def api_expense_detail(id):
-    expense = Expense.query.get_or_404(id)
+    expense = Expense.query.options(undefer_group('details')).get_or_404(id)
     
     # Build expense data dictionary
     expense_data = {
@@ -539,7 +1123,8 @@ def api_expense_detail(id):
         'is_reimbursable': expense.is_reimbursable,
         'reimbursement_status': expense.reimbursement_status,
         'reimbursement_notes': expense.reimbursement_notes,
-        'receipt_image': bool(expense.receipt_image),
+        'receipt_image': expense.has_receipt,
+        'receipt_thumbnail': url_for('view_receipt_thumbnail', id=expense.id, size=THUMBNAIL_SIZES[-1], v=expense.receipt_version) if expense.has_receipt_preview else None,
         'receipt_filename': expense.receipt_filename,
         'created_at': expense.created_at.isoformat() if expense.created_at else None,
         'updated_at': expense.updated_at.isoformat() if expense.updated_at else None,
@@ -572,39 +1157,12 @@ def dashboard():
     
     # Get date range for filtering
     period = request.args.get('period', 'month')
-    today = datetime.today()
+    start_date = period_start_date(period)
     
-    if period == 'week':
-        start_date = today - timedelta(days=7)
-    elif period == 'month':
-        start_date = today - timedelta(days=30)
-    elif period == 'quarter':
-        start_date = today - timedelta(days=90)
-    elif period == 'year':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=30)
-    
-    expenses_query = Expense.query.filter(Expense.date >= start_date)
-    all_expenses = expenses_query.all()
-    
-    # Calculate statistics
-    total_expenses = sum(e.cost or 0 for e in all_expenses)
-    expense_count = len(all_expenses)
+    # Calculate statistics (charts are loaded from /api/expense_data)
+    total_expenses, expense_count = expense_totals(start_date)
     avg_expense = total_expenses / expense_count if expense_count > 0 else 0
     
-    # Get top categories
-    category_totals = defaultdict(float)
-    for expense in all_expenses:
-        if expense.category:
-            category_totals[expense.category.name] += expense.cost or 0
-    
-    # Get payment method breakdown
-    payment_totals = defaultdict(float)
-    for expense in all_expenses:
-        if expense.payment_method:
-            payment_totals[expense.payment_method.name] += expense.cost or 0
-    
     return render_template('dashboard.html', 
                          settings=settings,
                          total_expenses=total_expenses,
@@ -631,117 +1189,83 @@ def dashboard_customize():
 
 @app.route('/api/expense_data')
 def api_expense_data():
-    period = request.args.get('period', 'month')
-    categories_filter = request.args.getlist('categories[]')
-    payment_methods_filter = request.args.getlist('payment_methods[]')
-    min_amount = request.args.get('min_amount', type=float)
-    max_amount = request.args.get('max_amount', type=float)
-    reimbursable_only = request.args.get('reimbursable_only', 'false').lower() == 'true'
-    reimbursement_status = request.args.get('reimbursement_status')
-    
-    # Check cache first
+    return jsonify(expense_chart_data(dashboard_filter_args(request.args)))
+
+def dashboard_filter_args(args):
+    """Parse the dashboard filters sent by dashboard-builder.js from a MultiDict"""
+    return dict(
+        period=args.get('period', 'month'),
+        categories=args.getlist('categories[]'),
+        payment_methods=args.getlist('payment_methods[]'),
+        min_amount=args.get('min_amount', type=float),
+        max_amount=args.get('max_amount', type=float),
+        reimbursable_only=args.get('reimbursable_only', 'false').lower() == 'true',
+        reimbursement_status=args.get('reimbursement_status')
+    )
+
+def dashboard_criteria(filters, source=Expense):
+    """Filter criteria for parsed dashboard filters"""
+    return expense_filter_criteria(
+        start_date=period_start_date(filters['period']),
+        categories=filters['categories'],
+        payment_methods=filters['payment_methods'],
+        min_amount=filters['min_amount'],
+        max_amount=filters['max_amount'],
+        reimbursable_only=filters['reimbursable_only'],
+        reimbursement_status=filters['reimbursement_status'],
+        source=source
+    )
+
+def expense_chart_data(filters):
+    """Build (or fetch from the result cache) the /api/expense_data payload for parsed filters"""
     cache_key = get_cache_key('expense_data',
-        period=period,
-        categories=','.join(map(str, categories_filter)) if categories_filter else '',
-        payment_methods=','.join(map(str, payment_methods_filter)) if payment_methods_filter else '',
-        min_amount=min_amount or '',
-        max_amount=max_amount or '',
-        reimbursable_only=reimbursable_only,
-        reimbursement_status=reimbursement_status or ''
+        period=filters['period'],
+        categories=','.join(map(str, filters['categories'])) if filters['categories'] else '',
+        payment_methods=','.join(map(str, filters['payment_methods'])) if filters['payment_methods'] else '',
+        min_amount=filters['min_amount'] or '',
+        max_amount=filters['max_amount'] or '',
+        reimbursable_only=filters['reimbursable_only'],
+        reimbursement_status=filters['reimbursement_status'] or ''
     )
     
     cached_result = get_from_cache(cache_key)
     if cached_result:
-        return jsonify(cached_result)
-    
-    today = datetime.today()
-    
-    if period == 'week':
-        start_date = today - timedelta(days=7)
-    elif period == 'month':
-        start_date = today - timedelta(days=30)
-    elif period == 'quarter':
-        start_date = today - timedelta(days=90)
-    elif period == 'year':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=30)
-    
-    # Build query with filters
-    query = Expense.query.filter(Expense.date >= start_date)
-    
-    if categories_filter:
-        query = query.filter(Expense.category_id.in_(categories_filter))
+        return cached_result
     
-    if payment_methods_filter:
-        query = query.filter(Expense.payment_method_id.in_(payment_methods_filter))
-    
-    if min_amount is not None:
-        query = query.filter(Expense.cost >= min_amount)
-    
-    if max_amount is not None:
-        query = query.filter(Expense.cost <= max_amount)
-    
-    if reimbursable_only:
-        query = query.filter(Expense.is_reimbursable.in_(['yes', 'maybe']))
-    
-    if reimbursement_status and reimbursement_status != 'all':
-        query = query.filter(Expense.reimbursement_status == reimbursement_status)
-    
-    expenses = query.all()
-    
-    # Category breakdown
-    category_data = defaultdict(float)
-    for expense in expenses:
-        category_name = expense.category.name if expense.category else 'Uncategorized'
-        category_data[category_name] += expense.cost or 0
-    
-    # Payment method breakdown
-    payment_data = defaultdict(float)
-    for expense in expenses:
-        payment_name = expense.payment_method.name if expense.payment_method else 'Unknown'
-        payment_data[payment_name] += expense.cost or 0
-    
-    # Daily trend
-    daily_data = defaultdict(float)
-    for expense in expenses:
-        date_str = expense.date.strftime('%Y-%m-%d') if expense.date else 'Unknown'
-        daily_data[date_str] += expense.cost or 0
-    
-    # Reimbursement statistics
-    reimbursable_total = sum(e.cost or 0 for e in expenses if e.is_reimbursable in ['yes', 'maybe'])
-    pending_reimbursements = sum(e.cost or 0 for e in expenses if e.is_reimbursable in ['yes', 'maybe'] and e.reimbursement_status == 'pending')
-    approved_reimbursements = sum(e.cost or 0 for e in expenses if e.is_reimbursable in ['yes', 'maybe'] and e.reimbursement_status == 'approved')
-    received_reimbursements = sum(e.cost or 0 for e in expenses if e.is_reimbursable in ['yes', 'maybe'] and e.reimbursement_status == 'received')
+    source = summary_source(filters['min_amount'], filters['max_amount'])
+    summary = summarize_expenses(*dashboard_criteria(filters, source), source=source)
+    daily_labels = sorted(summary['daily_totals'].keys())
     
     result = {
         'categories': {
-            'labels': list(category_data.keys()),
-            'data': list(category_data.values())
+            'labels': list(summary['category_totals'].keys()),
+            'data': list(summary['category_totals'].values())
         },
         'payment_methods': {
-            'labels': list(payment_data.keys()),
-            'data': list(payment_data.values())
+            'labels': list(summary['payment_totals'].keys()),
+            'data': list(summary['payment_totals'].values())
         },
         'daily_trend': {
-            'labels': sorted(daily_data.keys()),
-            'data': [daily_data[k] for k in sorted(daily_data.keys())]
+            'labels': daily_labels,
+            'data': [summary['daily_totals'][k] for k in daily_labels]
         },
         'reimbursement_stats': {
-            'total_reimbursable': reimbursable_total,
-            'pending': pending_reimbursements,
-            'approved': approved_reimbursements,
-            'received': received_reimbursements
+            'total_reimbursable': summary['reimbursable'],
+            'pending': summary['pending'],
+            'approved': summary['approved'],
+            'received': summary['received'],
+            'pending_count': summary['pending_count']
         },
-        'total_expenses': sum(e.cost or 0 for e in expenses),
-        'expense_count': len(expenses)
+        'total_expenses': summary['total'],
+        'expense_count': summary['count']
     }
     
     # Cache the result
     set_cache(cache_key, result)
-    return jsonify(result)
+    return result
 
 @app.route('/api/dashboard/presets', methods=['GET', 'POST'])
+@retry_write
 def api_dashboard_presets():
     if request.method == 'GET':
         presets = DashboardPreset.query.all()
@@ -778,6 +1302,7 @@ def api_dashboard_presets():
         }), 201
 
 @app.route('/api/dashboard/presets/<int:preset_id>', methods=['GET', 'PUT', 'DELETE'])
+@retry_write
 def api_dashboard_preset(preset_id):
     preset = DashboardPreset.query.get_or_404(preset_id)
     
@@ -830,73 +1355,139 @@ def api_widgets_data():
     payment_methods_filter = request.args.getlist('payment_methods[]')
     reimbursable_only = request.args.get('reimbursable_only', 'false').lower() == 'true'
     
-    today = datetime.today()
-    
-    if period == 'week':
-        start_date = today - timedelta(days=7)
-    elif period == 'month':
-        start_date = today - timedelta(days=30)
-    elif period == 'quarter':
-        start_date = today - timedelta(days=90)
-    elif period == 'year':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=30)
-    
-    # Build query with filters
-    query = Expense.query.filter(Expense.date >= start_date)
-    
-    if categories_filter:
-        query = query.filter(Expense.category_id.in_(categories_filter))
-    
-    if payment_methods_filter:
-        query = query.filter(Expense.payment_method_id.in_(payment_methods_filter))
-    
-    if reimbursable_only:
-        query = query.filter(Expense.is_reimbursable.in_(['yes', 'maybe']))
-    
-    expenses = query.all()
+    filters = dict(
+        start_date=period_start_date(period),
+        categories=categories_filter,
+        payment_methods=payment_methods_filter,
+        reimbursable_only=reimbursable_only
+    )
     
     # Return data based on widget type
+    if widget_type in ('total_spent', 'reimbursable_amount', 'pending_reimbursements', 'category_breakdown'):
+        summary = summarize_expenses(
+            *expense_filter_criteria(source=ExpenseDailyRollup, **filters),
+            source=ExpenseDailyRollup
+        )
+    
     if widget_type == 'total_spent':
-        return jsonify({'value': sum(e.cost or 0 for e in expenses)})
+        return jsonify({'value': summary['total']})
     
     elif widget_type == 'reimbursable_amount':
-        return jsonify({'value': sum(e.cost or 0 for e in expenses if e.is_reimbursable in ['yes', 'maybe'])})
+        return jsonify({'value': summary['reimbursable']})
     
     elif widget_type == 'pending_reimbursements':
-        pending = [e for e in expenses if e.is_reimbursable in ['yes', 'maybe'] and e.reimbursement_status == 'pending']
         return jsonify({
-            'count': len(pending),
-            'total': sum(e.cost or 0 for e in pending)
+            'count': summary['pending_count'],
+            'total': summary['pending']
         })
     
     elif widget_type == 'category_breakdown':
-        category_data = defaultdict(float)
-        for expense in expenses:
-            category_name = expense.category.name if expense.category else 'Uncategorized'
-            category_data[category_name] += expense.cost or 0
         return jsonify({
-            'labels': list(category_data.keys()),
-            'data': list(category_data.values())
+            'labels': list(summary['category_totals'].keys()),
+            'data': list(summary['category_totals'].values())
         })
     
     elif widget_type == 'recent_expenses':
-        recent = sorted(expenses, key=lambda x: x.created_at, reverse=True)[:10]
-        return jsonify([{
-            'id': e.id,
-            'title': e.title or 'Untitled',
-            'amount': e.cost or 0,
-            'category': e.category.name if e.category else 'Uncategorized',
-            'date': e.date.isoformat() if e.date else None,
-            'is_reimbursable': e.is_reimbursable,
-            'reimbursement_status': e.reimbursement_status
-        } for e in recent])
+        return jsonify(recent_expenses_data(expense_filter_criteria(**filters)))
     
     else:
         return jsonify({'error': 'Unknown widget type'}), 400
 
+def recent_expenses_data(criteria, limit=10):
+    """The most recently added expenses matching criteria, as widget rows"""
+    recent = expense_summary_query().filter(
+        *criteria
+    ).order_by(Expense.created_at.desc()).limit(limit).all()
+    return [{
+        'id': e.id,
+        'title': e.title or 'Untitled',
+        'amount': e.cost or 0,
+        'category': e.category.name if e.category else 'Uncategorized',
+        'date': e.date.isoformat() if e.date else None,
+        'is_reimbursable': e.is_reimbursable,
+        'reimbursement_status': e.reimbursement_status
+    } for e in recent]
+
+def top_categories(chart_data, limit=5):
+    ranked = sorted(zip(chart_data['categories']['labels'], chart_data['categories']['data']),
+                    key=lambda item: item[1], reverse=True)[:limit]
+    return {'labels': [label for label, _ in ranked], 'data': [value for _, value in ranked]}
+
+# Payload of each dashboard-builder widget type, derived from the shared /api/expense_data result
+WIDGET_PAYLOADS = {
+    'category-pie': lambda d: d['categories'],
+    'category-bar': lambda d: d['categories'],
+    'payment-pie': lambda d: d['payment_methods'],
+    'payment-bar': lambda d: d['payment_methods'],
+    'trend-line': lambda d: d['daily_trend'],
+    'trend-area': lambda d: d['daily_trend'],
+    'reimbursement-breakdown': lambda d: d['reimbursement_stats'],
+    'total-spent': lambda d: {'value': d['total_expenses']},
+    'reimbursable-amount': lambda d: {'value': d['reimbursement_stats']['total_reimbursable']},
+    'pending-reimbursements': lambda d: {
+        'count': d['reimbursement_stats']['pending_count'],
+        'total': d['reimbursement_stats']['pending']
+    },
+    'expense-count': lambda d: {'value': d['expense_count']},
+    'avg-expense': lambda d: {'value': d['total_expenses'] / d['expense_count'] if d['expense_count'] else 0},
+    'top-categories': top_categories,
+}
+
+@app.route('/api/widgets/batch', methods=['POST'])
+def api_widgets_batch():
+    """Return the data of every widget of a dashboard in one response.
+
+    Expects ``{"widgets": [{"id": ..., "type": ...}], "filters": {...}}`` with the
+    same filter names as /api/expense_data. The filtered aggregate is computed
+    (or read from the result cache) once and shared by all widgets; the recent
+    expenses list is only queried when a widget shows it.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    widgets = payload.get('widgets')
+    if not isinstance(widgets, list) or not all(isinstance(widget, dict) for widget in widgets):
+        return jsonify({'error': 'widgets must be a list of objects'}), 400
+    if not all(isinstance(widget.get('id'), (str, int)) and not isinstance(widget.get('id'), bool)
+               for widget in widgets):
+        return jsonify({'error': 'every widget needs a string or integer id'}), 400
+    if not isinstance(payload.get('filters') or {}, dict):
+        return jsonify({'error': 'filters must be an object'}), 400
+    
+    args = MultiDict()
+    for key, value in (payload.get('filters') or {}).items():
+        for item in (value if isinstance(value, list) else [value]):
+            args.add(key, str(item))
+    filters = dashboard_filter_args(args)
+    
+    chart_data = expense_chart_data(filters)
+    recent = None
+    results = {}
+    for widget in widgets:
+        widget_type = widget.get('type')
+        # JSON object keys are strings; converting here keeps mixed id types sortable
+        widget_id = str(widget['id'])
+        if widget_type == 'recent-expenses':
+            if recent is None:
+                recent = recent_expenses_data(dashboard_criteria(filters))
+            results[widget_id] = recent
+        elif isinstance(widget_type, str) and widget_type in WIDGET_PAYLOADS:
+            results[widget_id] = WIDGET_PAYLOADS[widget_type](chart_data)
+        else:
+            results[widget_id] = {'error': 'Unknown widget type'}
+    
+    return jsonify({'widgets': results})
+
+@app.route('/api/cache/stats', methods=['GET', 'DELETE'])
+def api_cache_stats():
+    """Result cache usage and per-endpoint hit/miss/eviction counters (DELETE resets the counters)"""
+    if request.method == 'DELETE':
+        result_cache.reset_stats()
+        return '', 204
+    return jsonify(result_cache.stats())
+
 @app.route('/api/homepage/config', methods=['GET', 'PUT'])
+@retry_write
 def api_homepage_config():
     config = HomepageConfig.query.first()
     if not config:
@@ -937,6 +1528,7 @@ def api_homepage_config():
         })
 
 @app.route('/settings', methods=['GET', 'POST'])
+@retry_write
 def settings_page():
     settings = Settings.query.first()
     if not settings:
@@ -955,16 +1547,17 @@ def settings_page():
     
     categories = Category.query.order_by(Category.name).all()
     payment_methods = PaymentMethod.query.order_by(PaymentMethod.name).all()
-    expenses = Expense.query.all()
+    expense_count = Expense.query.count()
     
     return render_template('settings.html', 
                          form=form, 
                          settings=settings,
                          categories=categories,
                          payment_methods=payment_methods,
-                         expenses=expenses)
+                         expense_count=expense_count)
 
 @app.route('/settings/category/add', methods=['POST'])
+@retry_write
 def add_category():
     form = CategoryForm()
     if form.validate_on_submit():
@@ -980,6 +1573,7 @@ def add_category():
     return redirect(url_for('settings_page'))
 
 @app.route('/settings/category/<int:id>/delete', methods=['POST'])
+@retry_write
 def delete_category(id):
     category = Category.query.get_or_404(id)
     if not category.is_default:
@@ -987,12 +1581,14 @@ def delete_category(id):
         Expense.query.filter_by(category_id=id).update({'category_id': None})
         db.session.delete(category)
         db.session.commit()
+        clear_cache()
         flash(f'Category "{category.name}" deleted successfully!', 'success')
     else:
         flash('Cannot delete default categories', 'warning')
     return redirect(url_for('settings_page'))
 
 @app.route('/settings/payment/add', methods=['POST'])
+@retry_write
 def add_payment_method():
     form = PaymentMethodForm()
     if form.validate_on_submit():
@@ -1006,6 +1602,7 @@ def add_payment_method():
     return redirect(url_for('settings_page'))
 
 @app.route('/settings/payment/<int:id>/delete', methods=['POST'])
+@retry_write
 def delete_payment_method(id):
     payment = PaymentMethod.query.get_or_404(id)
     if not payment.is_default:
@@ -1013,47 +1610,212 @@ def delete_payment_method(id):
         Expense.query.filter_by(payment_method_id=id).update({'payment_method_id': None})
         db.session.delete(payment)
         db.session.commit()
+        clear_cache()
         flash(f'Payment method "{payment.name}" deleted successfully!', 'success')
     else:
         flash('Cannot delete default payment methods', 'warning')
     return redirect(url_for('settings_page'))
 
+# Rows fetched per query while streaming an export
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_HEADER = ['Date', 'Title', 'Description', 'Category', 'Cost', 'Payment Method',
+                 'Location', 'Vendor', 'Notes', 'Tags', 'Has Receipt']
+
+def report_filter_args(args):
+    """Parse the filters shared by /report/pdf and /export"""
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    category_id = args.get('category_id')
+    payment_method_id = args.get('payment_method_id')
+    min_amount = args.get('min_amount')
+    max_amount = args.get('max_amount')
+    return dict(
+        start_date=datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+        end_date=datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None,
+        categories=[int(category_id)] if category_id and category_id != 'all' else None,
+        payment_methods=[int(payment_method_id)] if payment_method_id and payment_method_id != 'all' else None,
+        min_amount=float(min_amount) if min_amount else None,
+        max_amount=float(max_amount) if max_amount else None
+    )
+
+def export_filter_criteria(args):
+    """Filter criteria for an export request; malformed filters are a 400, as for /report/pdf"""
+    try:
+        return expense_filter_criteria(**report_filter_args(args))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+def iter_export_rows(criteria, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows newest first, one short keyset query per chunk.
+
+    Only the exported columns are selected and category/payment names are
+    joined in SQL, so memory stays flat and no read stays open between chunks.
+    """
+    keys, _ = EXPENSE_SORTS['date_desc']
+    query = db.session.query(
+        Expense.date,
+        Expense.title,
+        Expense.description,
+        Category.name,
+        Expense.cost,
+        PaymentMethod.name,
+        Expense.location,
+        Expense.vendor,
+        Expense.notes,
+        Expense.tags,
+        Expense.receipt_hash.isnot(None),
+        *keys
+    ).outerjoin(
+        Category, Expense.category_id == Category.id
+    ).outerjoin(
+        PaymentMethod, Expense.payment_method_id == PaymentMethod.id
+    ).filter(*criteria).order_by(*(key.desc() for key in keys))
+    
+    cursor = None
+    while True:
+        chunk_query = query
+        if cursor is not None:
+            chunk_query = chunk_query.filter(keys[0] <= cursor[0], tuple_(*keys) < tuple_(*cursor))
+        rows = chunk_query.limit(chunk_size).all()
+        for row in rows:
+            yield row[:-len(keys)]
+        if len(rows) < chunk_size:
+            return
+        cursor = rows[-1][-len(keys):]
+
 @app.route('/export')
 def export_csv():
-    expenses = Expense.query.order_by(Expense.date.desc()).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Date', 'Title', 'Description', 'Category', 'Cost', 'Payment Method', 
-                    'Location', 'Vendor', 'Notes', 'Tags', 'Has Receipt'])
-    
-    # Write data
-    for expense in expenses:
-        writer.writerow([
-            expense.date.strftime('%Y-%m-%d') if expense.date else '',
-            expense.title or '',
-            expense.description or '',
-            expense.category.name if expense.category else '',
-            expense.cost or 0,
-            expense.payment_method.name if expense.payment_method else '',
-            expense.location or '',
-            expense.vendor or '',
-            expense.notes or '',
-            expense.tags or '',
-            'Yes' if expense.receipt_image else 'No'
-        ])
+    """Stream expenses as CSV; accepts the same filters as /report/pdf"""
+    criteria = export_filter_criteria(request.args)
     
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode()),
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_HEADER)
+        
+        for i, (date, title, description, category, cost, payment, location, vendor, notes, tags, has_receipt) \
+                in enumerate(iter_export_rows(criteria), 1):
+            writer.writerow([
+                date.strftime('%Y-%m-%d') if date else '',
+                title or '',
+                description or '',
+                category or '',
+                cost or 0,
+                payment or '',
+                location or '',
+                vendor or '',
+                notes or '',
+                tags or '',
+                'Yes' if has_receipt else 'No'
+            ])
+            if i % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    filename = f'pcs_expenses_{datetime.now().strftime("%Y%m%d")}.csv'
+    return Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/export.xlsx')
+def export_xlsx():
+    """Export expenses as an Excel workbook; accepts the same filters as /export"""
+    criteria = export_filter_criteria(request.args)
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    
+    # A write-only sheet serializes each appended row to a temp file right away, so
+    # memory stays flat however many rows there are; the finished file is then streamed
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Expenses')
+    for column, width in zip('ABCDEFGHIJK', (12, 30, 40, 16, 12, 18, 20, 20, 40, 20, 12)):
+        sheet.column_dimensions[column].width = width
+    sheet.freeze_panes = 'A2'
+    
+    header = []
+    for name in EXPORT_HEADER:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    
+    for date, title, description, category, cost, payment, location, vendor, notes, tags, has_receipt \
+            in iter_export_rows(criteria):
+        # Dates get openpyxl's default yyyy-mm-dd format; only the cost needs a styled cell
+        cost_cell = WriteOnlyCell(sheet, value=cost or 0)
+        cost_cell.number_format = '#,##0.00'
+        sheet.append([date, title, description, category, cost_cell, payment, location, vendor, notes, tags,
+                      'Yes' if has_receipt else 'No'])
+    
+    spool = tempfile.TemporaryFile()
+    workbook.save(spool)
+    spool.seek(0)
+    return send_file(
+        spool,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         as_attachment=True,
-        download_name=f'pcs_expenses_{datetime.now().strftime("%Y%m%d")}.csv'
+        download_name=f'pcs_expenses_{datetime.now().strftime("%Y%m%d")}.xlsx'
     )
 
+@sqlite_profile.retry_on_locked(lambda: db.session.rollback(), attempts=app.config['SQLITE_WRITE_RETRIES'])
+def insert_expense_rows(rows):
+    """Insert one chunk of prepared import rows in its own short transaction"""
+    db.session.execute(insert(Expense), rows)
+    db.session.commit()
+
+@sqlite_profile.retry_on_locked(lambda: db.session.rollback(), attempts=app.config['SQLITE_WRITE_RETRIES'])
+def update_job(job_id, **values):
+    """Write job state in its own transaction so the polling endpoint sees it immediately"""
+    db.session.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+    db.session.commit()
+
+def run_import_job(job_id):
+    """Import a spooled upload; runs on import_executor, outside any request"""
+    from expense_import import ImportReport, ImportFileError, read_frames, run_import
+    with app.app_context():
+        path = db.session.get(BackgroundJob, job_id).input_path
+        report = ImportReport()
+        status, error, bytes_total = jobs.DONE, None, 0
+        try:
+            bytes_total = os.path.getsize(path)
+            update_job(job_id, status=jobs.RUNNING, worker=jobs.worker_id(), bytes_total=bytes_total)
+            categories = {c.name: c.id for c in Category.query.all()}
+            payment_methods = {p.name: p.id for p in PaymentMethod.query.all()}
+            with open(path, 'rb') as handle:
+                def save_progress(report):
+                    update_job(job_id, bytes_read=handle.tell(), **report.to_dict())
+                
+                frames = read_frames(handle, path, app.config['IMPORT_CHUNK_SIZE'])
+                run_import(frames, categories, payment_methods, insert_expense_rows, report, save_progress)
+        except Exception as e:
+            db.session.rollback()
+            status, error = jobs.FAILED, str(e)
+            if not isinstance(e, ImportFileError):
+                app.logger.exception('Import job %s failed', job_id)
+        finally:
+            # Chunks are committed as they go, so a failed job keeps the rows already imported;
+            # the cache is invalidated once for the whole file
+            if report.rows_inserted:
+                clear_cache()
+            update_job(job_id, status=status, error=error, finished_at=datetime.utcnow(), bytes_read=bytes_total,
+                       result=json.dumps({'errors': report.errors, 'errors_truncated': report.errors_truncated,
+                                          'warnings': report.warnings,
+                                          'warnings_truncated': report.warnings_truncated}),
+                       **report.to_dict())
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            db.session.remove()
+
 @app.route('/import', methods=['GET', 'POST'])
+@retry_write
 def import_csv():
     settings = Settings.query.first()
     
@@ -1067,54 +1829,48 @@ def import_csv():
             flash('No file selected', 'warning')
             return redirect(url_for('import_csv'))
         
-        if file and file.filename.endswith('.csv'):
+        from expense_import import IMPORT_EXTENSIONS
+        extension = os.path.splitext(file.filename)[1].lower()
+        if file and extension in IMPORT_EXTENSIONS:
+            # Spool the upload and hand it to a background job; the page polls /api/jobs/<id>
+            job = BackgroundJob(kind='import', filename=secure_filename(file.filename), worker=jobs.worker_id())
+            job.id = uuid.uuid4().hex
+            job.input_path = os.path.join(app.config['JOB_FOLDER'], f'{job.id}{extension}')
+            os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
+            file.save(job.input_path)
             try:
-                df = pd.read_csv(io.StringIO(file.read().decode('utf-8')))
-                
-                # Get category and payment method mappings
-                categories = {c.name: c.id for c in Category.query.all()}
-                payment_methods = {p.name: p.id for p in PaymentMethod.query.all()}
-                
-                imported_count = 0
-                for _, row in df.iterrows():
-                    expense = Expense()
-                    expense.title = row.get('Title', 'Imported Expense')
-                    expense.description = row.get('Description', '')
-                    expense.cost = float(row.get('Cost', 0))
-                    expense.location = row.get('Location', '')
-                    expense.vendor = row.get('Vendor', '')
-                    expense.notes = row.get('Notes', '')
-                    expense.tags = row.get('Tags', '')
-                    
-                    # Parse date
-                    if 'Date' in row and pd.notna(row['Date']):
-                        try:
-                            expense.date = pd.to_datetime(row['Date']).date()
-                        except:
-                            expense.date = datetime.today().date()
-                    
-                    # Map category
-                    if 'Category' in row and row['Category'] in categories:
-                        expense.category_id = categories[row['Category']]
-                    
-                    # Map payment method
-                    if 'Payment Method' in row and row['Payment Method'] in payment_methods:
-                        expense.payment_method_id = payment_methods[row['Payment Method']]
-                    
-                    db.session.add(expense)
-                    imported_count += 1
-                
+                db.session.add(job)
                 db.session.commit()
-                flash(f'Successfully imported {imported_count} expenses!', 'success')
-                return redirect(url_for('expenses'))
-                
-            except Exception as e:
-                flash(f'Error importing file: {str(e)}', 'danger')
-                return redirect(url_for('import_csv'))
+            except Exception:
+                # The job row was rolled back; a retried attempt spools the upload again under a new id
+                os.remove(job.input_path)
+                raise
+            import_executor.submit(run_import_job, job.id)
+            return redirect(url_for('import_csv', job=job.id))
+        
+        flash('Please upload a .csv or .xlsx file', 'warning')
+        return redirect(url_for('import_csv'))
     
+    job = db.session.get(BackgroundJob, request.args['job']) if request.args.get('job') else None
     categories = Category.query.all()
     payment_methods = PaymentMethod.query.all()
-    return render_template('import.html', settings=settings, categories=categories, payment_methods=payment_methods)
+    return render_template('import.html', settings=settings, categories=categories, payment_methods=payment_methods,
+                           job=job)
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """Progress of a background job"""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status not in jobs.FINISHED_STATES and not jobs.worker_alive(job.worker):
+        # The worker running the job exited (restart, timeout, crash) before finishing it
+        update_job(job.id, status=jobs.FAILED, error='The worker running this job exited before it finished',
+                   finished_at=datetime.utcnow())
+        if job.input_path and os.path.exists(job.input_path):
+            os.remove(job.input_path)
+        db.session.refresh(job)
+    return jsonify(job.to_dict())
 
 @app.route('/template')
 def download_template():
@@ -1149,75 +1905,100 @@ def report_config():
     default_end_date = datetime.today().date()
     default_start_date = (datetime.today() - timedelta(days=30)).date()
     
+    # Set when a browser without JavaScript was redirected here after queueing a report
+    job = db.session.get(BackgroundJob, request.args['job']) if request.args.get('job') else None
+    
     return render_template('report_config.html',
                           categories=categories,
                           payment_methods=payment_methods,
                           default_start_date=default_start_date,
-                          default_end_date=default_end_date)
+                          default_end_date=default_end_date,
+                          default_chart_backend=app.config['REPORT_CHART_BACKEND'],
+                          job=job)
 
-@app.route('/report/pdf')
-def generate_pdf_report():
-    """Generate a PDF report of expenses with PCS branding"""
-    # Get filter parameters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    category_id = request.args.get('category_id')
-    payment_method_id = request.args.get('payment_method_id')
-    min_amount = request.args.get('min_amount')
-    max_amount = request.args.get('max_amount')
-    
-    # Get content options
-    include_summary = request.args.get('include_summary') == 'on'
-    include_category_breakdown = request.args.get('include_category_breakdown') == 'on'
-    include_payment_breakdown = request.args.get('include_payment_breakdown') == 'on'
-    include_monthly_trend = request.args.get('include_monthly_trend') == 'on'
-    include_pie_chart = request.args.get('include_pie_chart') == 'on'
-    include_bar_chart = request.args.get('include_bar_chart') == 'on'
-    include_trend_chart = request.args.get('include_trend_chart') == 'on'
-    include_expense_table = request.args.get('include_expense_table') == 'on'
-    include_descriptions = request.args.get('include_descriptions') == 'on'
-    include_notes = request.args.get('include_notes') == 'on'
-    include_locations = request.args.get('include_locations') == 'on'
-    
-    # Get report options
-    report_title = request.args.get('report_title', 'PCS Expense Report')
-    page_size_str = request.args.get('page_size', 'letter')
-    include_logo = request.args.get('include_logo') == 'on'
-    include_page_numbers = request.args.get('include_page_numbers') == 'on'
-    
-    # Build query
-    query = Expense.query
-    
-    if start_date:
-        query = query.filter(Expense.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Expense.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    if category_id and category_id != 'all':
-        query = query.filter(Expense.category_id == int(category_id))
-    if payment_method_id and payment_method_id != 'all':
-        query = query.filter(Expense.payment_method_id == int(payment_method_id))
-    if min_amount:
-        query = query.filter(Expense.cost >= float(min_amount))
-    if max_amount:
-        query = query.filter(Expense.cost <= float(max_amount))
-    
-    expenses = query.order_by(Expense.date.desc()).all()
-    
-    # Create PDF buffer
-    buffer = io.BytesIO()
-    
-    # Determine page size
-    if page_size_str == 'a4':
-        page_size = A4
-    elif page_size_str == 'legal':
-        page_size = legal
-    else:
-        page_size = letter
+REPORT_FLAGS = (
+    'include_summary', 'include_category_breakdown', 'include_payment_breakdown', 'include_monthly_trend',
+    'include_pie_chart', 'include_bar_chart', 'include_trend_chart', 'include_expense_table',
+    'include_descriptions', 'include_notes', 'include_locations', 'include_category_subtotals',
+    'include_logo', 'include_page_numbers'
+)
+REPORT_FILTERS = ('start_date', 'end_date', 'category_id', 'payment_method_id', 'min_amount', 'max_amount')
+REPORT_PAGE_SIZES = ('letter', 'a4', 'legal')
+# pdf_utils.CHART_BACKENDS, repeated so validating report options does not import ReportLab
+REPORT_CHART_BACKENDS = ('matplotlib', 'vector')
+
+def report_options(args):
+    """Normalize /report/pdf query args into the JSON-serializable options a report job runs with.
+
+    Raises ValueError for malformed filters so the request can be rejected before queueing.
+    """
+    options = {flag: args.get(flag) == 'on' for flag in REPORT_FLAGS}
+    options['report_title'] = args.get('report_title', 'PCS Expense Report')
+    options['page_size'] = args.get('page_size') if args.get('page_size') in REPORT_PAGE_SIZES else 'letter'
+    chart_backend = args.get('chart_backend')
+    options['chart_backend'] = chart_backend if chart_backend in REPORT_CHART_BACKENDS else app.config['REPORT_CHART_BACKEND']
+    for name in REPORT_FILTERS:
+        value = (args.get(name) or '').strip()
+        options[name] = value if value and value != 'all' else None
+    report_filter_args(options)
+    return options
+
+def build_pdf_report(options, output):
+    """Render the PDF report described by report_options() into a file path or stream"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, A4, legal
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER
+    pdf_utils = load_pdf_utils()
+    
+    include_summary = options['include_summary']
+    include_category_breakdown = options['include_category_breakdown']
+    include_payment_breakdown = options['include_payment_breakdown']
+    include_monthly_trend = options['include_monthly_trend']
+    include_pie_chart = options['include_pie_chart']
+    include_bar_chart = options['include_bar_chart']
+    include_trend_chart = options['include_trend_chart']
+    include_expense_table = options['include_expense_table']
+    include_descriptions = options['include_descriptions']
+    include_notes = options['include_notes']
+    include_locations = options['include_locations']
+    include_category_subtotals = options.get('include_category_subtotals', False)
+    chart_backend = options.get('chart_backend', app.config['REPORT_CHART_BACKEND'])
+    
+    report_title = options['report_title']
+    include_logo = options['include_logo']
+    
+    # Build filters
+    filters = report_filter_args(options)
+    
+    # Summary figures come from one aggregate query (the rollup when no amount bounds are set)
+    source = summary_source(filters['min_amount'], filters['max_amount'])
+    summary = summarize_expenses(*expense_filter_criteria(source=source, **filters), source=source)
+    expense_count = summary['count']
+    total_amount = summary['total']
+    
+    # Category pie chart, payment method bar chart and spending trend chart. Cache misses start
+    # rendering on this report process's chart threads now, while the tables below are built
+    charts = []
+    if include_pie_chart and summary['category_totals']:
+        charts.append((pdf_utils.create_pie_chart, (dict(summary['category_totals']), "Expense Categories"),
+                       {'backend': chart_backend}))
+    if include_bar_chart and summary['payment_totals']:
+        charts.append((pdf_utils.create_bar_chart, (dict(summary['payment_totals']), "Payment Methods Used"),
+                       {'backend': chart_backend}))
+    if include_trend_chart and expense_count:
+        charts.append((pdf_utils.create_trend_chart, (summary['daily_totals'], "Monthly Spending Trend"),
+                       {'backend': chart_backend}))
+    executor = chart_executor if app.config['REPORT_CHART_THREADS'] > 1 and len(charts) > 1 else None
+    pending_charts = pdf_utils.submit_charts(charts, executor)
+    
     
     # Create the PDF document
     doc = SimpleDocTemplate(
-        buffer,
-        pagesize=page_size,
+        output,
+        pagesize={'letter': letter, 'a4': A4, 'legal': legal}[options['page_size']],
         rightMargin=72,
         leftMargin=72,
         topMargin=72,
@@ -1273,19 +2054,23 @@ def generate_pdf_report():
     )
     
     elements.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", metadata_style))
-    elements.append(Paragraph(f"Total Expenses: {len(expenses)}", metadata_style))
-    elements.append(Paragraph(f"Total Amount: ${sum(e.cost or 0 for e in expenses):,.2f}", metadata_style))
+    elements.append(Paragraph(f"Total Expenses: {expense_count}", metadata_style))
+    elements.append(Paragraph(f"Total Amount: ${total_amount:,.2f}", metadata_style))
     elements.append(Spacer(1, 0.5*inch))
     
     # Create summary statistics table if requested
     if include_summary:
+        highest, lowest = db.session.query(
+            func.max(func.coalesce(Expense.cost, 0)),
+            func.min(func.coalesce(Expense.cost, 0))
+        ).filter(*expense_filter_criteria(**filters)).one()
         summary_data = [
             ['Summary Statistics', ''],
-            ['Total Expenses:', f"${sum(e.cost or 0 for e in expenses):,.2f}"],
-            ['Number of Transactions:', str(len(expenses))],
-            ['Average Expense:', f"${(sum(e.cost or 0 for e in expenses) / len(expenses) if expenses else 0):,.2f}"],
-            ['Highest Expense:', f"${max((e.cost or 0 for e in expenses), default=0):,.2f}"],
-            ['Lowest Expense:', f"${min((e.cost or 0 for e in expenses), default=0):,.2f}"]
+            ['Total Expenses:', f"${total_amount:,.2f}"],
+            ['Number of Transactions:', str(expense_count)],
+            ['Average Expense:', f"${(total_amount / expense_count if expense_count else 0):,.2f}"],
+            ['Highest Expense:', f"${highest or 0:,.2f}"],
+            ['Lowest Expense:', f"${lowest or 0:,.2f}"]
         ]
         
         summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
@@ -1303,16 +2088,9 @@ def generate_pdf_report():
         elements.append(summary_table)
         elements.append(Spacer(1, 0.5*inch))
     
-    # Calculate totals for various breakdowns
-    category_totals = defaultdict(float)
-    payment_totals = defaultdict(float)
-    
-    for expense in expenses:
-        category_name = expense.category.name if expense.category else 'Uncategorized'
-        category_totals[category_name] += expense.cost or 0
-        
-        payment_name = expense.payment_method.name if expense.payment_method else 'Unknown'
-        payment_totals[payment_name] += expense.cost or 0
+    # Totals for the various breakdowns
+    category_totals = summary['category_totals']
+    payment_totals = summary['payment_totals']
     
     # Category breakdown table
     if include_category_breakdown and category_totals:
@@ -1362,7 +2140,7 @@ def generate_pdf_report():
     
     # Monthly trend table
     if include_monthly_trend:
-        monthly_data = calculate_monthly_breakdown(expenses)
+        monthly_data = pdf_utils.calculate_monthly_breakdown(summary['daily_totals'])
         if monthly_data:
             elements.append(Paragraph("Monthly Spending Breakdown", heading_style))
             monthly_table_data = [['Month', 'Total Spent']]
@@ -1392,25 +2170,9 @@ def generate_pdf_report():
         elements.append(Paragraph("Visual Analytics", heading_style))
         elements.append(Spacer(1, 0.25*inch))
     
-    # Category pie chart
-    if include_pie_chart and category_totals:
-        pie_chart = create_pie_chart(dict(category_totals), "Expense Categories")
-        if pie_chart:
-            elements.append(pie_chart)
-            elements.append(Spacer(1, 0.5*inch))
-    
-    # Payment method bar chart
-    if include_bar_chart and payment_totals:
-        bar_chart = create_bar_chart(dict(payment_totals), "Payment Methods Used")
-        if bar_chart:
-            elements.append(bar_chart)
-            elements.append(Spacer(1, 0.5*inch))
-    
-    # Spending trend chart
-    if include_trend_chart and expenses:
-        trend_chart = create_trend_chart(expenses, "Monthly Spending Trend")
-        if trend_chart:
-            elements.append(trend_chart)
+    for chart in pdf_utils.collect_charts(pending_charts):
+        if chart:
+            elements.append(chart)
             elements.append(Spacer(1, 0.5*inch))
     
     # Add page break before expense table if we have charts
@@ -1418,7 +2180,7 @@ def generate_pdf_report():
         elements.append(PageBreak())
     
     # Detailed expense list
-    if include_expense_table and expenses:
+    if include_expense_table and expense_count:
         elements.append(Paragraph("Detailed Expense List", heading_style))
         
         # Build column headers based on selected options
@@ -1450,93 +2212,258 @@ def generate_pdf_report():
             scale_factor = 7.5*inch / total_width
             col_widths = [w * scale_factor for w in col_widths]
         
-        expense_data = [headers]
-        
-        for expense in expenses:
-            row = [
-                expense.date.strftime('%m/%d/%Y') if expense.date else 'N/A',
-                (expense.title or 'Untitled')[:30]
-            ]
-            
-            if include_descriptions:
-                desc = (expense.description or '')[:40]
-                if len(expense.description or '') > 40:
-                    desc += '...'
-                row.append(desc)
-            
-            row.append(expense.category.name if expense.category else 'N/A')
-            row.append(f"${expense.cost:,.2f}" if expense.cost else '$0.00')
-            row.append(expense.payment_method.name[:15] if expense.payment_method else 'N/A')
-            
-            if include_locations:
-                location = expense.location or expense.vendor or 'N/A'
-                row.append(location[:20])
-            
-            if include_notes:
-                notes = (expense.notes or '')[:30]
-                if len(expense.notes or '') > 30:
-                    notes += '...'
-                row.append(notes)
-            
-            expense_data.append(row)
-        
-        expense_table = Table(expense_data, colWidths=col_widths)
-        expense_table.setStyle(TableStyle([
+        # Built once and shared by every page-sized segment of the table
+        amount_col = headers.index('Amount')
+        table_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (amount_col, 1), (amount_col, -1), 'RIGHT'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
             ('FONTSIZE', (0, 0), (-1, 0), 9),
             ('FONTSIZE', (0, 1), (-1, -1), 8),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
             ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        ])
         
-        # Find amount column and right-align it
-        amount_col = headers.index('Amount')
-        expense_table.setStyle(TableStyle([
-            ('ALIGN', (amount_col, 1), (amount_col, -1), 'RIGHT'),
-        ]))
+        # Per-category subtotals, accumulated while the rows stream into the table
+        subtotals = defaultdict(lambda: [0, 0.0])
+        
+        def expense_rows():
+            for date, title, description, category, cost, payment, location, vendor, notes, _, _ \
+                    in iter_export_rows(expense_filter_criteria(**filters)):
+                subtotal = subtotals[category or 'N/A']
+                subtotal[0] += 1
+                subtotal[1] += cost or 0
+                
+                row = [
+                    date.strftime('%m/%d/%Y') if date else 'N/A',
+                    (title or 'Untitled')[:30]
+                ]
+                
+                if include_descriptions:
+                    desc = (description or '')[:40]
+                    if len(description or '') > 40:
+                        desc += '...'
+                    row.append(desc)
+                
+                row.append(category or 'N/A')
+                row.append(f"${cost:,.2f}" if cost else '$0.00')
+                row.append(payment[:15] if payment else 'N/A')
+                
+                if include_locations:
+                    row.append((location or vendor or 'N/A')[:20])
+                
+                if include_notes:
+                    note = (notes or '')[:30]
+                    if len(notes or '') > 30:
+                        note += '...'
+                    row.append(note)
+                
+                yield row
         
-        elements.append(expense_table)
+        def subtotal_elements():
+            if not include_category_subtotals or not subtotals:
+                return []
+            subtotal_data = [['Category', 'Expenses', 'Subtotal']]
+            for category, (count, amount) in sorted(subtotals.items(), key=lambda item: item[1][1], reverse=True):
+                subtotal_data.append([category, str(count), f"${amount:,.2f}"])
+            subtotal_data.append(['Total', str(sum(count for count, _ in subtotals.values())),
+                                  f"${sum(amount for _, amount in subtotals.values()):,.2f}"])
+            subtotal_table = Table(subtotal_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
+            subtotal_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('LINEABOVE', (0, -1), (-1, -1), 1, colors.HexColor('#0d6efd')),
+                ('GRID', (0, 0), (-1, -2), 1, colors.grey)
+            ]))
+            return [Spacer(1, 0.25*inch), Paragraph("Category Subtotals", heading_style), subtotal_table]
+        
+        # Rows are pulled from a chunked query and laid out a page at a time during doc.build
+        elements.append(pdf_utils.SegmentedTable(headers, expense_rows(), col_widths, table_style, tail=subtotal_elements))
     
     # Build PDF
     doc.build(elements)
-    
-    # Rewind the buffer
-    buffer.seek(0)
-    
-    # Generate filename with timestamp
+
+def report_data_version():
+    """Version of the data reports are rendered from.
+
+    The cache generation changes on every write through the app; the expense
+    count and latest update keep the version moving even if the generation
+    counter is ever reset (memory backend restart, recreated cache file).
+    """
+    count, last_update = db.session.query(func.count(Expense.id), func.max(Expense.updated_at)).one()
+    return f"{result_cache.generation()}:{count}:{last_update}"
+
+def run_report_job(job_id, cache_key):
+    """Render a queued report into the report cache; runs in a report_executor process"""
+    with app.app_context():
+        options = db.session.get(BackgroundJob, job_id).get_params()
+        # Rendered under a temporary name so a half-built file is never served
+        partial = report_cache.temp_path()
+        update_job(job_id, status=jobs.RUNNING, worker=jobs.worker_id())
+        try:
+            build_pdf_report(options, partial)
+            path = report_cache.put(cache_key, partial)
+            update_job(job_id, status=jobs.DONE, finished_at=datetime.utcnow(),
+                       result=json.dumps({'path': path, 'size': os.path.getsize(path)}))
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception('Report job %s failed', job_id)
+            update_job(job_id, status=jobs.FAILED, error=str(e), finished_at=datetime.utcnow())
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            db.session.remove()
+
+@app.route('/report/pdf')
+@retry_write
+def generate_pdf_report():
+    """Queue a PDF report of expenses; the report page polls /api/jobs/<id> and then downloads it.
+
+    A report already rendered with the same options from the same data is served from the report cache.
+    """
+    try:
+        options = report_options(request.args)
+    except ValueError as e:
+        abort(400, description=str(e))
+    
+    # The version is taken before rendering, so a write during the render only orphans the result
+    cache_key = report_cache.make_key(options, report_data_version())
+    cached_path = report_cache.get(cache_key)
+    wants_json = request.accept_mimetypes.best == 'application/json'
     filename = f"pcs_expense_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    if cached_path and not wants_json:
+        return send_file(cached_path, mimetype='application/pdf', as_attachment=True, download_name=filename)
+    
+    job = BackgroundJob(kind='report', filename=filename, worker=jobs.worker_id())
+    job.id = uuid.uuid4().hex
+    job.set_params(options)
+    if cached_path:
+        job.status = jobs.DONE
+        job.finished_at = datetime.utcnow()
+        job.result = json.dumps({'path': cached_path, 'size': os.path.getsize(cached_path), 'cached': True})
+    db.session.add(job)
+    db.session.commit()
+    if not cached_path:
+        report_executor.submit(run_report_job, job.id, cache_key)
     
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
-    )
+    if wants_json:
+        return jsonify(job.to_dict()), 200 if cached_path else 202
+    return redirect(url_for('report_config', job=job.id))
+
+@app.route('/report/<job_id>/download')
+def download_report(job_id):
+    """Download the PDF rendered by a finished report job"""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.kind != 'report' or job.status != jobs.DONE:
+        abort(404)
+    path = job.get_result().get('path')
+    if not path or not os.path.exists(path):
+        abort(410, description='This report was evicted from the report cache; please generate it again')
+    return send_file(path, mimetype='application/pdf', as_attachment=True, download_name=job.filename)
+
+@app.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """Recompute the expense_daily_rollup table from the expense table"""
+    with db.engine.begin() as connection:
+        rebuild_expense_rollup(connection)
+    clear_cache()
+    print("✅ Expense daily rollup rebuilt")
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Create missing expense indexes and show whether the main queries use them"""
+    from db_init import create_expense_indexes, report_index_usage
+    raw_conn = db.engine.raw_connection()
+    try:
+        created = create_expense_indexes(raw_conn)
+        if created:
+            print(f"✓ Created {len(created)} expense index(es): {', '.join(created)}")
+        ok = report_index_usage(raw_conn)
+    finally:
+        raw_conn.close()
+    print("✅ All checked queries use their index" if ok else "⚠ Some queries do not use the expected index")
 
 @app.errorhandler(413)
 def too_large(e):
     flash('File is too large. Maximum size is 16MB.', 'danger')
     return redirect(url_for('new_expense'))
 
-def initialize_app():
-    """Initialize the application, create directories and database"""
+def create_app_directories():
+    """Create the data directories the app writes to"""
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    os.makedirs(datadir, exist_ok=True)
+    os.makedirs(os.path.join(basedir, 'uploads'), exist_ok=True)
+    os.makedirs(app.config['RECEIPT_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['RECEIPT_THUMBNAIL_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['REPORT_FOLDER'], exist_ok=True)
+
+def initialize_database_schema():
+    """Run the migrations, create missing tables and seed default rows.
+
+    Does no locking: the caller makes sure only one process runs it, either
+    the gunicorn master (gunicorn.conf.py) or the worker holding the init lock.
+    """
     # Import here to avoid circular dependencies
-    from db_init import run_auto_migration, initialize_database
+    from db_init import (run_auto_migration, initialize_database, get_database_path,
+                         schema_fingerprint, schema_is_current, record_schema_fingerprint)
+    
+    # Fast path: the database was already migrated and seeded for exactly this schema
+    db_path = get_database_path()
+    fingerprint = schema_fingerprint(db.metadata)
+    if schema_is_current(db_path, fingerprint):
+        print(f"Worker {os.getpid()}: Database schema is current (fingerprint {fingerprint:08x}), skipping migration")
+        ensure_expense_rollup()
+        return
+    
+    # Run automatic database migration first
+    migrated = run_auto_migration()
+    if migrated:
+        print(f"Worker {os.getpid()}: Database migration completed successfully")
+    else:
+        print(f"Worker {os.getpid()}: Warning: Database migration encountered issues")
+    
+    # Create tables and initialize data
+    with app.app_context():
+        db.create_all()
+        # Use db_init's initialization which includes version tracking
+        initialize_database(app, db)
+    ensure_expense_rollup()
+    
+    # Only a clean run lets the next start take the fast path
+    if migrated:
+        record_schema_fingerprint(db_path, fingerprint)
+
+def initialize_app():
+    """Initialize the application, create directories and database.
+
+    Used when every worker imports the app on its own (python app.py, flask
+    run, gunicorn without gunicorn.conf.py): the first worker to take the
+    init lock initializes and the others wait for it.
+    """
     import fcntl
     import time
     
     # Create directories before database initialization
-    basedir = os.path.abspath(os.path.dirname(__file__))
-    os.makedirs(os.path.join(basedir, 'data'), exist_ok=True)
-    os.makedirs(os.path.join(basedir, 'uploads'), exist_ok=True)
+    create_app_directories()
+    
+    # Cheapest check first: the database already matches this code's schema
+    from db_init import get_database_path, schema_fingerprint, schema_is_current
+    if schema_is_current(get_database_path(), schema_fingerprint(db.metadata)):
+        print(f"Worker {os.getpid()}: Database schema is current, skipping initialization")
+        ensure_expense_rollup()
+        return
     
     # Use a lock file to ensure only one worker initializes the database
-    lock_file = os.path.join(basedir, 'data', '.init.lock')
-    init_complete_file = os.path.join(basedir, 'data', '.init.complete')
+    lock_file = os.path.join(datadir, '.init.lock')
+    init_complete_file = os.path.join(datadir, '.init.complete')
     
     # Check if initialization is already complete
     if os.path.exists(init_complete_file):
@@ -1559,18 +2486,7 @@ def initialize_app():
                 
                 # We got the lock, we're the first worker
                 print(f"Worker {os.getpid()}: Starting database initialization...")
-                
-                # Run automatic database migration first
-                if run_auto_migration():
-                    print(f"Worker {os.getpid()}: Database migration completed successfully")
-                else:
-                    print(f"Worker {os.getpid()}: Warning: Database migration encountered issues")
-                
-                # Create tables and initialize data
-                with app.app_context():
-                    db.create_all()
-                    # Use db_init's initialization which includes version tracking
-                    initialize_database(app, db)
+                initialize_database_schema()
                 
                 # Mark initialization as complete
                 with open(init_complete_file, 'w') as f:
@@ -1598,10 +2514,28 @@ def initialize_app():
         print(f"Worker {os.getpid()}: Error during initialization: {e}")
         # Continue anyway, the database might already be initialized
 
-# Only initialize once - use environment variable to track
+def report_sqlite_profile():
+    """Log the SQLite settings this worker's connections actually run with"""
+    try:
+        with app.app_context():
+            raw_conn = db.engine.raw_connection()
+            try:
+                settings = sqlite_profile.effective_settings(raw_conn)
+            finally:
+                raw_conn.close()
+        print(f"Worker {os.getpid()}: SQLite profile: " + ', '.join(f"{k}={v}" for k, v in settings.items()))
+        requested_mode = app.config['SQLITE_PRAGMAS']['journal_mode']
+        if settings['journal_mode'] != requested_mode:
+            print(f"Worker {os.getpid()}: Warning: journal_mode is {settings['journal_mode']}, not {requested_mode}")
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Warning: Could not read SQLite settings: {e}")
+
+# Only initialize once - use environment variable to track. gunicorn.conf.py sets it
+# and initializes in the master instead, before any worker is forked.
 if os.environ.get('PCS_DB_INITIALIZED') != 'true':
     os.environ['PCS_DB_INITIALIZED'] = 'true'
     initialize_app()
+    report_sqlite_profile()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -6,28 +6,121 @@ Automatically runs on application startup to ensure database is up-to-date.
 """
 
 import os
+import json
 import sqlite3
+import hashlib
 from datetime import datetime
 import shutil
+from receipt_store import ReceiptStore
 
 # Current application version
-CURRENT_VERSION = "2.2.0"
+CURRENT_VERSION = "2.7.0"
 
 # Migration history - maps versions to their required migrations
 MIGRATION_HISTORY = {
     "2.0.0": [],  # Base version
     "2.1.0": ["reimbursement_tracking", "dashboard_preset", "homepage_config", "version_tracking"],
-    "2.2.0": ["reimbursable_status_enum"]
+    "2.2.0": ["reimbursable_status_enum"],
+    "2.3.0": ["receipt_store"],
+    "2.4.0": ["expense_daily_rollup"],  # Table, triggers and backfill are created by db.create_all()
+    "2.5.0": ["expense_indexes"],
+    "2.6.0": ["background_job"],  # Table is created by db.create_all()
+    "2.7.0": ["report_jobs"]
 }
 
+# Number of receipt blobs moved to disk per transaction
+RECEIPT_MIGRATION_BATCH_SIZE = 50
+
+# Indexes on the expense table for the filter and sort columns used by the
+# list, dashboard, widget and report queries. The list-order expression and
+# the partial-index predicate must match the SQL the app generates
+# (see EXPENSE_SORTS and reimbursable_criterion in app.py) for SQLite to use them.
+EXPENSE_INDEXES = {
+    "ix_expense_date_created": "ON expense (date, created_at, id)",
+    "ix_expense_category_date": "ON expense (category_id, date)",
+    "ix_expense_payment_date": "ON expense (payment_method_id, date)",
+    "ix_expense_cost": "ON expense (cost)",
+    "ix_expense_created_at": "ON expense (created_at)",
+    "ix_expense_list_order": "ON expense (coalesce(date, ''), coalesce(created_at, ''), id)",
+    "ix_expense_reimbursable": "ON expense (reimbursement_status, date) WHERE is_reimbursable IN ('yes', 'maybe')",
+}
+
+# Representative forms of the main queries and the index each should use
+INDEX_CHECK_QUERIES = [
+    ("expense list page", "ix_expense_list_order",
+     "SELECT id FROM expense WHERE coalesce(date, '') <= ? "
+     "AND (coalesce(date, ''), coalesce(created_at, ''), id) < (?, ?, ?) "
+     "ORDER BY coalesce(date, '') DESC, coalesce(created_at, '') DESC, id DESC LIMIT 51",
+     ('2100-01-01', '2100-01-01', '', 0)),
+    ("date range", "ix_expense_date_created",
+     "SELECT id, cost FROM expense WHERE date >= ? AND date <= ? ORDER BY date",
+     ('2000-01-01', '2100-01-01')),
+    ("category filter", "ix_expense_category_date",
+     "SELECT id FROM expense WHERE category_id IN (?) AND date >= ?", (1, '2000-01-01')),
+    ("payment method filter", "ix_expense_payment_date",
+     "SELECT id FROM expense WHERE payment_method_id IN (?) AND date >= ?", (1, '2000-01-01')),
+    ("amount range", "ix_expense_cost",
+     "SELECT id FROM expense WHERE cost >= ? AND cost <= ?", (0, 10)),
+    ("recent expenses", "ix_expense_created_at",
+     "SELECT id FROM expense ORDER BY created_at DESC LIMIT 10", ()),
+    ("pending reimbursements", "ix_expense_reimbursable",
+     "SELECT id, cost FROM expense WHERE is_reimbursable IN ('yes', 'maybe') AND reimbursement_status = ?",
+     ('pending',)),
+]
+
 def ensure_database_directory():
     """Ensure the data directory exists"""
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    data_dir = os.environ.get('PCS_DATA_DIR') or os.path.join(os.path.dirname(__file__), 'data')
     if not os.path.exists(data_dir):
         print(f"Creating data directory: {data_dir}")
         os.makedirs(data_dir, exist_ok=True)
     return data_dir
 
+def get_database_path():
+    return os.path.join(ensure_database_directory(), 'pcs_tracker.db')
+
+def schema_fingerprint(metadata):
+    """Fingerprint of the schema this code expects, as a positive 31-bit int for PRAGMA user_version.
+
+    Covers CURRENT_VERSION, the model tables (columns, types, indexes) and
+    EXPENSE_INDEXES, so a release that changes any of them runs the full
+    migration and seeding path once.
+    """
+    tables = {
+        table.name: {
+            'columns': [[column.name, str(column.type), column.nullable] for column in table.columns],
+            'indexes': sorted(index.name for index in table.indexes if index.name),
+        }
+        for table in metadata.tables.values()
+    }
+    payload = json.dumps({'version': CURRENT_VERSION, 'tables': tables, 'expense_indexes': EXPENSE_INDEXES},
+                         sort_keys=True)
+    return int.from_bytes(hashlib.sha256(payload.encode()).digest()[:4], 'big') & 0x7fffffff or 1
+
+def schema_is_current(db_path, fingerprint):
+    """Whether the database was fully migrated and seeded for ``fingerprint``.
+
+    One PRAGMA read on a read-only connection; a missing database is never current.
+    """
+    if not os.path.exists(db_path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0] == fingerprint
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+def record_schema_fingerprint(db_path, fingerprint):
+    """Mark the database as migrated and seeded for ``fingerprint`` (0 forces a full check next start)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(f"PRAGMA user_version = {int(fingerprint)}")
+    finally:
+        conn.close()
+
 def get_database_version(cursor):
     """Get the current database version from settings table"""
     try:
@@ -52,6 +145,75 @@ def update_database_version(cursor, version):
         except sqlite3.Error:
             pass
 
+def migrate_receipt_blobs(conn, receipts_dir, batch_size=RECEIPT_MIGRATION_BATCH_SIZE):
+    """Move receipt_image BLOBs into the on-disk receipt store in batches.
+
+    Each batch is written to disk before its rows are pointed at the stored
+    files and committed, so an interrupted run can simply be restarted.
+    """
+    cursor = conn.cursor()
+    store = ReceiptStore(receipts_dir)
+    moved = 0
+    last_id = 0
+    
+    while True:
+        cursor.execute(
+            "SELECT id, receipt_image FROM expense WHERE id > ? AND receipt_image IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        
+        for expense_id, blob in rows:
+            digest, size = store.put(bytes(blob))
+            cursor.execute(
+                "UPDATE expense SET receipt_hash = ?, receipt_size = ?, receipt_image = NULL WHERE id = ?",
+                (digest, size, expense_id)
+            )
+            last_id = expense_id
+        
+        conn.commit()
+        moved += len(rows)
+        print(f"  Moved {moved} receipt(s) to {receipts_dir}")
+    
+    return moved
+
+def create_expense_indexes(conn):
+    """Create any missing EXPENSE_INDEXES; returns the names created"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='expense'")}
+    created = []
+    for name, definition in EXPENSE_INDEXES.items():
+        if name not in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+            created.append(name)
+    if created:
+        # Refresh planner statistics for the new indexes
+        conn.execute("ANALYZE expense")
+    conn.commit()
+    return created
+
+def verify_index_usage(conn):
+    """Run EXPLAIN QUERY PLAN for INDEX_CHECK_QUERIES.
+
+    Returns a list of (description, expected index, plan text, ok) tuples.
+    """
+    results = []
+    for description, index_name, sql, params in INDEX_CHECK_QUERIES:
+        plan = ' | '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        results.append((description, index_name, plan, index_name in plan))
+    return results
+
+def report_index_usage(conn):
+    """Print the index verification results; returns True if every query uses its index"""
+    results = verify_index_usage(conn)
+    for description, index_name, plan, ok in results:
+        if ok:
+            print(f"  ✓ {description}: {index_name}")
+        else:
+            print(f"  ⚠ {description}: expected {index_name}, plan is: {plan}")
+    return all(ok for *_, ok in results)
+
 def check_and_migrate_database(db_path):
     """Check database schema and apply migrations if needed"""
     
@@ -249,6 +411,62 @@ def check_and_migrate_database(db_path):
                 conn.rollback()
                 raise
         
+        # Move receipt blobs out of the database into the content-addressed store
+        cursor.execute("PRAGMA table_info(expense)")
+        expense_columns = [col[1] for col in cursor.fetchall()]
+        
+        if 'receipt_hash' not in expense_columns:
+            print("Applying migration: Moving receipts to on-disk store...")
+            
+            try:
+                cursor.execute("ALTER TABLE expense ADD COLUMN receipt_hash VARCHAR(64)")
+                cursor.execute("ALTER TABLE expense ADD COLUMN receipt_size INTEGER")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Migration error: {e}")
+                conn.rollback()
+                raise
+        
+        if 'receipt_image' in expense_columns:
+            receipts_dir = os.path.join(os.path.dirname(db_path), 'receipts')
+            moved = migrate_receipt_blobs(conn, receipts_dir)
+            
+            # Drop the emptied column (SQLite 3.35+) and reclaim the freed pages. Older SQLite
+            # keeps the (now all NULL) column, so only VACUUM when this run freed something;
+            # otherwise every start would rewrite the whole database.
+            dropped = sqlite3.sqlite_version_info >= (3, 35, 0)
+            if dropped:
+                cursor.execute("ALTER TABLE expense DROP COLUMN receipt_image")
+                conn.commit()
+            if moved or dropped:
+                conn.execute("VACUUM")
+                migrations_applied.append("receipt_store")
+                print(f"✓ {moved} receipt(s) moved to on-disk store")
+        
+        # Report jobs store their options with the job
+        cursor.execute("PRAGMA table_info(background_job)")
+        job_columns = [column[1] for column in cursor.fetchall()]
+        if job_columns and 'params' not in job_columns:
+            print("Applying migration: Adding report job parameters...")
+            try:
+                cursor.execute("ALTER TABLE background_job ADD COLUMN params TEXT DEFAULT '{}'")
+                conn.commit()
+                migrations_applied.append("report_jobs")
+                print("✓ Report job parameters column added")
+            except sqlite3.Error as e:
+                print(f"Migration error: {e}")
+                conn.rollback()
+                raise
+        
+        # Index the hot filter and sort columns
+        created = create_expense_indexes(conn)
+        if created:
+            migrations_applied.append("expense_indexes")
+            print(f"✓ Created {len(created)} expense index(es): {', '.join(created)}")
+            print("Verifying query plans...")
+            if not report_index_usage(conn):
+                print("Warning: some queries do not use the expected index")
+        
         # Update database version after migrations
         if migrations_applied:
             update_database_version(cursor, CURRENT_VERSION)
@@ -283,6 +501,16 @@ def initialize_database(app, db):
             print(f"Warning: Error creating tables: {e}")
             # Tables might already exist
         
+        # New databases get their indexes here; existing ones in check_and_migrate_database
+        try:
+            raw_conn = db.engine.raw_connection()
+            try:
+                create_expense_indexes(raw_conn)
+            finally:
+                raw_conn.close()
+        except Exception as e:
+            print(f"Warning: Error creating expense indexes: {e}")
+        
         # Check if we need to add default data
         try:
             category_count = Category.query.count()
@@ -427,7 +655,8 @@ def rollback_reimbursable_enum_migration(db_path):
                     cost FLOAT DEFAULT 0.0,
                     payment_method_id INTEGER,
                     date DATE,
-                    receipt_image BLOB,
+                    receipt_hash VARCHAR(64),
+                    receipt_size INTEGER,
                     receipt_filename VARCHAR(200),
                     receipt_mimetype VARCHAR(100),
                     location VARCHAR(200),
@@ -449,14 +678,14 @@ def rollback_reimbursable_enum_migration(db_path):
             cursor.execute("""
                 INSERT INTO expense_rollback (
                     id, title, description, category_id, cost, payment_method_id,
-                    date, receipt_image, receipt_filename, receipt_mimetype,
+                    date, receipt_hash, receipt_size, receipt_filename, receipt_mimetype,
                     location, vendor, notes, tags, custom_data,
                     is_reimbursable, reimbursement_status, reimbursement_notes,
                     created_at, updated_at
                 )
                 SELECT 
                     id, title, description, category_id, cost, payment_method_id,
-                    date, receipt_image, receipt_filename, receipt_mimetype,
+                    date, receipt_hash, receipt_size, receipt_filename, receipt_mimetype,
                     location, vendor, notes, tags, custom_data,
                     CASE 
                         WHEN is_reimbursable = 'yes' THEN 1
@@ -473,6 +702,8 @@ def rollback_reimbursable_enum_migration(db_path):
             
             # Update version back to 2.1.1
             update_database_version(cursor, "2.1.1")
+            # Make the next start run the full schema check instead of the fingerprint fast path
+            cursor.execute("PRAGMA user_version = 0")
             
             conn.commit()
             print("✅ Rollback completed successfully")
@@ -494,8 +725,7 @@ def run_auto_migration():
     print("==========================================")
     
     # Ensure data directory exists
-    data_dir = ensure_database_directory()
-    db_path = os.path.join(data_dir, 'pcs_tracker.db')
+    db_path = get_database_path()
     
     # Check and apply migrations
     if check_and_migrate_database(db_path):
@@ -0,0 +1,280 @@
+"""
+Column-wise expense import.
+
+Uploaded CSV and XLSX files are read in chunks of rows, the latter through
+openpyxl's read-only row iterator, so no file is ever loaded whole. Each chunk is normalized with
+vectorized pandas operations: dates are parsed per column, category and
+payment names are mapped to ids with ``Series.map``, and costs are coerced to
+numbers. Rows that fail validation go into an ``ImportReport`` with their
+spreadsheet row number. They are not allowed to abort the file. Unknown
+category or payment method names do not reject a row: as in the original
+importer the row is kept without one, and a warning is reported. The
+remaining rows are handed to an ``insert_rows`` callable as a list of column
+dicts, one short transaction per chunk.
+"""
+import csv
+import io
+import os
+import zipfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+# Spreadsheet header -> expense column
+IMPORT_COLUMNS = {
+    'Date': 'date',
+    'Title': 'title',
+    'Description': 'description',
+    'Category': 'category_id',
+    'Cost': 'cost',
+    'Payment Method': 'payment_method_id',
+    'Location': 'location',
+    'Vendor': 'vendor',
+    'Notes': 'notes',
+    'Tags': 'tags',
+}
+TEXT_COLUMNS = ('Description', 'Location', 'Vendor', 'Notes', 'Tags')
+DEFAULT_TITLE = 'Imported Expense'
+
+# Tried in order on the values still unparsed; anything left falls back to per-value inference
+DATE_FORMATS = ('ISO8601', '%m/%d/%Y')
+
+# Only the first rejected rows are kept for display; all of them are counted
+MAX_REPORTED_ERRORS = 1000
+
+# Upload types the import accepts
+IMPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be imported at all (as opposed to individual bad rows)"""
+
+
+class ImportReport:
+    """Running totals and per-row errors of one import"""
+
+    def __init__(self):
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.rows_rejected = 0
+        self.errors = []  # (row number, column, value, message) of skipped rows
+        self.warnings = []  # same, for rows imported with a value dropped
+
+    def reject(self, errors):
+        self.rows_rejected += len({row for row, _, _, _ in errors})
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def warn(self, warnings):
+        room = MAX_REPORTED_ERRORS - len(self.warnings)
+        if room > 0:
+            self.warnings.extend(warnings[:room])
+
+    @property
+    def errors_truncated(self):
+        return len(self.errors) >= MAX_REPORTED_ERRORS
+
+    @property
+    def warnings_truncated(self):
+        return len(self.warnings) >= MAX_REPORTED_ERRORS
+
+    def errors_csv(self):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Row', 'Column', 'Value', 'Error'])
+        writer.writerows(self.errors)
+        return output.getvalue()
+
+    def to_dict(self):
+        return {
+            'rows_parsed': self.rows_parsed,
+            'rows_inserted': self.rows_inserted,
+            'rows_rejected': self.rows_rejected,
+        }
+
+
+def read_csv_frames(stream, chunk_size):
+    """Yield the rows of a CSV upload as string DataFrames of ``chunk_size`` rows"""
+    try:
+        reader = pd.read_csv(stream, dtype=str, chunksize=chunk_size, encoding='utf-8-sig',
+                             skipinitialspace=True)
+        for frame in reader:
+            yield frame
+    except (UnicodeDecodeError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise ImportFileError(f'Could not read CSV file: {e}') from e
+
+
+def read_xlsx_frames(stream, chunk_size):
+    """Yield the first sheet of a workbook as DataFrames of ``chunk_size`` rows.
+
+    The sheet is walked with openpyxl's read-only row iterator. Blank rows
+    are skipped, and each frame is indexed so row numbers match the sheet.
+    """
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ImportFileError(f'Could not read Excel file: {e}') from e
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = ['' if name is None else str(name) for name in header]
+        width = len(header)
+        chunk, index = [], []
+        for number, row in enumerate(rows, 2):
+            if all(value is None or value == '' for value in row):
+                continue
+            chunk.append((tuple(row) + (None,) * width)[:width])
+            index.append(number - 2)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=header, index=index, dtype=object)
+                chunk, index = [], []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header, index=index, dtype=object)
+    finally:
+        workbook.close()
+
+
+def read_frames(stream, filename, chunk_size):
+    """Pick the reader for an upload by its file extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        return read_xlsx_frames(stream, chunk_size)
+    if extension == '.csv':
+        return read_csv_frames(stream, chunk_size)
+    raise ImportFileError(f'Unsupported file type: {extension or filename}')
+
+
+def _text(values):
+    """Stripped string column with blanks as <NA>"""
+    text = values.astype('string').str.strip()
+    return text.mask(text == '')
+
+
+def parse_dates(values):
+    text = _text(values)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in DATE_FORMATS:
+        pending = parsed.isna() & text.notna()
+        if not pending.any():
+            return parsed
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+    pending = parsed.isna() & text.notna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(text[pending], format='mixed', errors='coerce')
+    return parsed
+
+
+def parse_costs(values):
+    """Coerce bank-style amounts ("$1,234.50", "(12.00)") to floats; bad values become NaN"""
+    text = _text(values)
+    negative = text.str.fullmatch(r'\(.*\)', na=False)
+    costs = pd.to_numeric(text.str.replace(r'[\s$,()]', '', regex=True), errors='coerce')
+    costs = costs.astype('float64')
+    costs[negative] = -costs[negative].abs()
+    costs[~np.isfinite(costs)] = np.nan
+    return costs
+
+
+def map_names(values, ids_by_name):
+    """Map names to ids case-insensitively; returns (ids, unknown-name mask)"""
+    lookup = {name.strip().casefold(): id for name, id in ids_by_name.items()}
+    keys = _text(values).str.casefold()
+    ids = keys.astype(object).map(lookup)
+    return ids, keys.notna() & ids.isna()
+
+
+def prepare_frame(frame, categories, payment_methods, today=None):
+    """Validate one chunk of uploaded rows.
+
+    Returns ``(records, errors, warnings)`` where records are column dicts
+    ready to be inserted, errors are (row number, column, value, message)
+    tuples for skipped rows and warnings are the same for rows imported
+    without an unknown category or payment method.
+    Row numbers count the header as row 1, as spreadsheets do.
+    """
+    frame = frame.rename(columns=lambda name: str(name).strip())
+    if not set(IMPORT_COLUMNS) & set(frame.columns):
+        raise ImportFileError('No recognized columns; expected a header row with ' +
+                              ', '.join(IMPORT_COLUMNS))
+    today = today or date.today()
+    rows = frame.index.to_series() + 2
+    empty = pd.Series(pd.NA, index=frame.index, dtype='string')
+
+    def column(name):
+        return frame[name] if name in frame.columns else empty
+
+    out = pd.DataFrame(index=frame.index)
+    checks = []
+    notices = []
+
+    title = _text(column('Title'))
+    out['title'] = title.fillna(DEFAULT_TITLE)
+    for name in TEXT_COLUMNS:
+        out[IMPORT_COLUMNS[name]] = _text(column(name)).fillna('')
+
+    dates = parse_dates(column('Date'))
+    checks.append(('Date', dates.isna() & _text(column('Date')).notna(), 'Unrecognized date'))
+    out['date'] = dates.dt.date.where(dates.notna(), today)
+
+    if 'Cost' in frame.columns:
+        costs = parse_costs(frame['Cost'])
+        checks.append(('Cost', costs.isna(), 'Cost is missing or not a number'))
+        out['cost'] = costs
+    else:
+        out['cost'] = 0.0
+
+    # Unknown names leave the column empty (NULL) instead of rejecting the row
+    category_ids, unknown = map_names(column('Category'), categories)
+    notices.append(('Category', unknown, 'Unknown category; imported without one'))
+    out['category_id'] = category_ids
+
+    payment_ids, unknown = map_names(column('Payment Method'), payment_methods)
+    notices.append(('Payment Method', unknown, 'Unknown payment method; imported without one'))
+    out['payment_method_id'] = payment_ids
+
+    def problems(found, keep=None):
+        result = []
+        for name, mask, message in found:
+            if keep is not None:
+                mask = mask & keep
+            if mask.any():
+                values = column(name)[mask].astype(object).where(column(name)[mask].notna(), '')
+                result.extend(zip(rows[mask], [name] * int(mask.sum()), values, [message] * int(mask.sum())))
+        result.sort(key=lambda problem: problem[0])
+        return [(int(row), name, str(value), message) for row, name, value, message in result]
+
+    rejected = pd.Series(False, index=frame.index)
+    for _, mask, _ in checks:
+        rejected |= mask
+    errors = problems(checks)
+    # Rows that are skipped anyway get no warnings
+    warnings = problems(notices, keep=~rejected)
+
+    valid = out[~rejected].astype(object)
+    records = valid.where(valid.notna(), None).to_dict('records')
+    return records, errors, warnings
+
+
+def run_import(frames, categories, payment_methods, insert_rows, report=None, on_progress=None):
+    """Prepare and insert every chunk of ``frames``, accumulating an ImportReport.
+
+    ``on_progress(report)`` is called after each chunk has been inserted.
+    """
+    report = report or ImportReport()
+    for frame in frames:
+        records, errors, warnings = prepare_frame(frame, categories, payment_methods)
+        report.rows_parsed += len(frame)
+        report.reject(errors)
+        report.warn(warnings)
+        if records:
+            insert_rows(records)
+            report.rows_inserted += len(records)
+        if on_progress:
+            on_progress(report)
+    return report
@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration: initialize once in the master, then fork.
+
+The app is preloaded in the master. There ``on_starting`` runs the
+migrations and database seeding exactly once, before any worker exists, so
+workers skip the init lock and sentinel handling in ``initialize_app`` and
+come up in milliseconds. They also share the master's imported code
+copy-on-write. Connections the master opened are disposed of before
+forking, and each worker drops any inherited pool in ``post_fork``, so no
+SQLite connection is ever used by two processes. When a worker exits,
+``worker_exit`` shuts down its import threads and report processes, so
+restarts (max_requests, timeouts, reloads) do not leave pool processes behind.
+
+Gunicorn loads ./gunicorn.conf.py by default; command line options and
+GUNICORN_CMD_ARGS still override these settings.
+"""
+import os
+
+# app.py initializes the database on import unless this is set; on_starting does it instead.
+# Set before the app is preloaded, and inherited by every worker.
+os.environ['PCS_DB_INITIALIZED'] = 'true'
+
+bind = '0.0.0.0:5001'
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+timeout = 120
+preload_app = True
+
+
+def on_starting(server):
+    """Runs once in the master, after the app was preloaded and before workers are forked"""
+    import app
+    app.create_app_directories()
+    print(f"Master {os.getpid()}: Starting database initialization...")
+    app.initialize_database_schema()
+    print(f"Master {os.getpid()}: Database initialization complete")
+    app.report_sqlite_profile()
+    with app.app.app_context():
+        app.db.engine.dispose()
+
+
+def post_fork(server, worker):
+    """Runs in each new worker: forget any pooled connection inherited from the master"""
+    import app
+    with app.app.app_context():
+        # close=False leaves the parent's connections alone; this worker opens its own
+        app.db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    """Runs in a worker as it exits: stop its background job pools and their processes"""
+    import app
+    app.shutdown_executors()
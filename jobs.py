@@ -0,0 +1,90 @@
+"""
+Background execution of long-running requests.
+
+A route records a ``BackgroundJob`` row and spools its input under
+``data/jobs``. It then submits the work to a ``JobExecutor`` and returns
+right away. The browser polls ``/api/jobs/<id>`` for progress, which the job
+writes back to its row as it goes. The sync gunicorn worker that took the
+upload is therefore free for the next request while the job runs.
+
+Executors are created lazily and per process. A forked gunicorn worker never
+inherits the parent's pool, whose threads do not exist in the child.
+Process pools use the spawn start method, so their children import the app
+afresh and share no state (threads, connections, locks) with the worker.
+Each gunicorn worker owns its pools, so a deployment runs up to
+``workers x max_workers`` pool processes; ``shutdown`` stops them when the
+worker exits.
+"""
+import os
+import socket
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Job states, in the order a job moves through them
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+FINISHED_STATES = (DONE, FAILED)
+
+
+def worker_id():
+    """Identifies the process running a job, so orphaned jobs can be detected"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_alive(worker):
+    """Whether the process named by ``worker_id()`` still exists.
+
+    Processes on other hosts cannot be checked and are assumed alive.
+    """
+    if not worker:
+        return True
+    host, _, pid = worker.rpartition(':')
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class JobExecutor:
+    """Lazily created, per-process thread or process pool for background jobs"""
+
+    def __init__(self, max_workers, name='job', processes=False):
+        self.max_workers = max_workers
+        self.name = name
+        self.processes = processes
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self, replace=False):
+        with self._lock:
+            if replace or self._pool is None or self._pid != os.getpid():
+                if self.processes:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                self._pid = os.getpid()
+            return self._pool
+
+    def shutdown(self, wait=True):
+        """Stop this process's pool: running jobs finish (if wait), queued ones are cancelled"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            # A pool inherited over a fork belongs to the parent and must not be touched
+            if pool is None or self._pid != os.getpid():
+                return
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, fn, *args, **kwargs):
+        try:
+            return self._executor().submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A pool process died (e.g. killed for memory); start a fresh pool
+            return self._executor(replace=True).submit(fn, *args, **kwargs)
@@ -1,39 +1,272 @@
 """
 PDF generation utilities with chart creation
+
+Charts come from one of two backends. ``matplotlib`` rasterizes each chart
+to a PNG. ``vector`` draws it natively as a ReportLab ``Drawing``, which is
+faster, smaller and resolution-independent, and never imports matplotlib.
+Matplotlib charts are drawn on their own ``Figure``/``FigureCanvasAgg`` with
+no pyplot state. ``submit_charts`` hands the charts of a report that miss
+the cache to an executor, so they are rendered concurrently while the rest
+of the report is assembled, and ``collect_charts`` waits for them. Reports
+are built in pool processes, so the executor there is a thread pool.
+
+``SegmentedTable`` lays out tables of any length from a row iterator, one
+page at a time.
+
+Rendered chart PNGs are memoized in ``chart_cache``. The key is a hash of the
+chart type, its data, title and size. Reports built from unchanged totals
+therefore skip matplotlib entirely. The cache has a small per-process memory
+tier and an optional size-bounded disk tier shared by all processes; see
+``configure_chart_cache``.
 """
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from io import BytesIO
-from reportlab.platypus import Image
-from collections import defaultdict
-from datetime import datetime, timedelta
+from reportlab.platypus import Image, Flowable, LongTable, Spacer, FrameBreak
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.widgets.markers import makeMarker
+from collections import defaultdict, OrderedDict
+from datetime import datetime
 import calendar
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Bump when the chart styling changes so previously cached PNGs are not reused
+CHART_STYLE_VERSION = 1
+
+CHART_BACKENDS = ('matplotlib', 'vector')
+
+# PCS colors, in the order pie slices use them
+CHART_COLORS = ['#0d6efd', '#28a745', '#dc3545', '#ffc107', '#17a2b8',
+                '#6f42c1', '#fd7e14', '#20c997', '#e83e8c', '#6c757d']
+PRIMARY_COLOR = '#0d6efd'
+
+def _figure(size):
+    """A standalone Agg figure with one axes.
+
+    matplotlib is imported on first use, so reports drawn with the vector
+    backend never load it. No pyplot state is involved, which keeps
+    rendering safe to run on several threads at once.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
+def _currency_axis(axis):
+    from matplotlib.ticker import FuncFormatter
+    axis.set_major_formatter(FuncFormatter(lambda x, p: f'${x:,.0f}'))
+
+def _rotate_labels(labels):
+    for label in labels:
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+class ChartCache:
+    """Rendered chart PNGs in a memory LRU backed by an optional disk LRU"""
+    
+    def __init__(self, root=None, memory_bytes=8 * 1024 * 1024, disk_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()  # key -> PNG bytes
+        self._memory_total = 0
+        self._disk_approx_bytes = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(kind, data, title, size):
+        payload = json.dumps([CHART_STYLE_VERSION, kind, data, title, size], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.png")
+    
+    def get(self, key):
+        """Return cached PNG bytes, or None"""
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                return png
+        if not self.root:
+            return None
+        try:
+            with open(self.path(key), 'rb') as f:
+                png = f.read()
+            # Touch the file so eviction sees it as recently used
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return None
+        self._remember(key, png)
+        return png
+    
+    def put(self, key, png):
+        self._remember(key, png)
+        if self.root:
+            self._write(key, png)
+    
+    def _remember(self, key, png):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = png
+            self._memory_total += len(png)
+            while self._memory_total > self.memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_total -= len(evicted)
+    
+    def _write(self, key, png):
+        target = self.path(key)
+        shard_dir = os.path.dirname(target)
+        os.makedirs(shard_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=shard_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, target)
+        except OSError:
+            # The disk tier is best effort; the chart itself was rendered fine
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        with self._lock:
+            if self._disk_approx_bytes is None:
+                self._disk_approx_bytes = sum(size for _, _, size in self._entries())
+            else:
+                self._disk_approx_bytes += len(png)
+            over_limit = self._disk_approx_bytes > self.disk_bytes
+        if over_limit:
+            self.evict()
+    
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.png'):
+                    full_path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except FileNotFoundError:
+                        continue
+                    yield full_path, stat.st_mtime, stat.st_size
+    
+    def evict(self, target_ratio=0.9):
+        """Delete least-recently-used PNGs until the disk tier is below target_ratio of disk_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        limit = self.disk_bytes * target_ratio
+        for full_path, _, size in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(full_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_approx_bytes = total
+
+chart_cache = ChartCache()
+
+def configure_chart_cache(root=None, memory_bytes=8 * 1024 * 1024, disk_bytes=64 * 1024 * 1024):
+    """Replace the chart cache; root=None keeps PNGs in memory only"""
+    global chart_cache
+    chart_cache = ChartCache(root, memory_bytes, disk_bytes)
+    return chart_cache
+
+class _PendingChart:
+    """A chart PNG being rendered on an executor"""
+
+    def __init__(self, key, future, image_size):
+        self.key = key
+        self.future = future
+        self.image_size = image_size
 
-def create_pie_chart(data_dict, title="Category Breakdown"):
-    """Create a pie chart and return it as a ReportLab Image"""
+    def image(self):
+        png = self.future.result()
+        chart_cache.put(self.key, png)
+        return Image(BytesIO(png), width=self.image_size[0], height=self.image_size[1])
+
+def _cached_chart(kind, data, title, size, image_size, render, render_args, executor=None):
+    """Return a ReportLab Image of a chart, rendering the PNG only on a cache miss.
+
+    With an executor the miss is submitted to it and a _PendingChart is
+    returned instead; ``render_charts`` resolves it.
+    """
+    key = chart_cache.make_key(kind, data, title, size)
+    png = chart_cache.get(key)
+    if png is None:
+        if executor is not None:
+            return _PendingChart(key, executor.submit(render, *render_args), image_size)
+        png = render(*render_args)
+        chart_cache.put(key, png)
+    return Image(BytesIO(png), width=image_size[0], height=image_size[1])
+
+def _figure_png(fig):
+    """Serialize a figure to PNG bytes"""
+    img_buffer = BytesIO()
+    fig.tight_layout()
+    fig.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
+    return img_buffer.getvalue()
+
+def submit_charts(charts, executor=None):
+    """Start building several charts, submitting cache misses to ``executor``.
+
+    ``charts`` is a list of ``(create_chart, args, kwargs)``. Returns the
+    charts in the same order, with misses still pending; pass the result to
+    ``collect_charts``. Without an executor the charts are rendered one by
+    one, right here. A process pool is ignored when this already runs in a
+    pool process, such as a report job, so pools are never nested.
+    """
+    if isinstance(executor, ProcessPoolExecutor) and multiprocessing.parent_process() is not None:
+        executor = None
+    return [create_chart(*args, executor=executor, **kwargs) for create_chart, args, kwargs in charts]
+
+def collect_charts(results):
+    """Wait for the charts started by ``submit_charts``; returns Images/Drawings (or None)"""
+    return [result.image() if isinstance(result, _PendingChart) else result for result in results]
+
+def render_charts(charts, executor=None):
+    """Build several charts, rendering cache misses concurrently on ``executor``"""
+    return collect_charts(submit_charts(charts, executor))
+
+def _top_slices(data_dict, limit=8):
+    """Largest (label, value) pairs, with anything past ``limit`` grouped as Other"""
+    sorted_data = sorted(data_dict.items(), key=lambda x: x[1], reverse=True)
+    slices = sorted_data[:limit]
+    if len(sorted_data) > limit:
+        slices.append(('Other', sum(v for k, v in sorted_data[limit:])))
+    return slices
+
+def create_pie_chart(data_dict, title="Category Breakdown", backend='matplotlib', executor=None):
+    """Create a pie chart and return it as a ReportLab Image (or Drawing with the vector backend)"""
     if not data_dict:
         return None
+    if backend == 'vector':
+        return _vector_pie_chart(data_dict, title)
+    return _cached_chart('pie', data_dict, title, (6, 6), (4*72, 4*72),  # 4 inches square
+                         _render_pie_chart, (data_dict, title), executor)
+
+def _render_pie_chart(data_dict, title):
+    fig, ax = _figure((6, 6))
     
-    fig, ax = plt.subplots(figsize=(6, 6))
-    
-    # Sort data by value
-    sorted_data = sorted(data_dict.items(), key=lambda x: x[1], reverse=True)
-    labels = [f"{k}\n${v:,.0f}" for k, v in sorted_data[:8]]  # Top 8 categories
-    values = [v for k, v in sorted_data[:8]]
-    
-    # If there are more than 8 categories, group the rest as "Other"
-    if len(sorted_data) > 8:
-        other_total = sum(v for k, v in sorted_data[8:])
-        labels.append(f"Other\n${other_total:,.0f}")
-        values.append(other_total)
+    # Top 8 categories, the rest grouped as "Other"
+    slices = _top_slices(data_dict)
+    labels = [f"{k}\n${v:,.0f}" for k, v in slices]
+    values = [v for k, v in slices]
     
     # Create pie chart with PCS colors
-    colors_list = ['#0d6efd', '#28a745', '#dc3545', '#ffc107', '#17a2b8', 
-                   '#6f42c1', '#fd7e14', '#20c997', '#e83e8c', '#6c757d']
-    
     wedges, texts, autotexts = ax.pie(values, labels=labels, autopct='%1.1f%%',
-                                       colors=colors_list[:len(values)],
+                                       colors=CHART_COLORS[:len(values)],
                                        startangle=90)
     
     # Enhance text
@@ -46,21 +279,20 @@ def create_pie_chart(data_dict, title="Category Breakdown"):
     
     ax.set_title(title, fontsize=12, fontweight='bold', color='#0d6efd')
     
-    # Save to BytesIO
-    img_buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
-    plt.close()
-    
-    img_buffer.seek(0)
-    return Image(img_buffer, width=4*72, height=4*72)  # 4 inches square
+    return _figure_png(fig)
 
-def create_bar_chart(data_dict, title="Payment Methods", xlabel="", ylabel="Amount ($)"):
-    """Create a bar chart and return it as a ReportLab Image"""
+def create_bar_chart(data_dict, title="Payment Methods", xlabel="", ylabel="Amount ($)", backend='matplotlib',
+                     executor=None):
+    """Create a bar chart and return it as a ReportLab Image (or Drawing with the vector backend)"""
     if not data_dict:
         return None
-    
-    fig, ax = plt.subplots(figsize=(8, 4))
+    if backend == 'vector':
+        return _vector_bar_chart(data_dict, title)
+    return _cached_chart('bar', [data_dict, xlabel, ylabel], title, (8, 4), (5.5*72, 3*72),  # 5.5 x 3 inches
+                         _render_bar_chart, (data_dict, title, xlabel, ylabel), executor)
+
+def _render_bar_chart(data_dict, title, xlabel, ylabel):
+    fig, ax = _figure((8, 4))
     
     # Sort and prepare data
     sorted_data = sorted(data_dict.items(), key=lambda x: x[1], reverse=True)
@@ -83,51 +315,59 @@ def create_bar_chart(data_dict, title="Payment Methods", xlabel="", ylabel="Amou
     
     # Rotate x labels if many categories
     if len(categories) > 5:
-        plt.xticks(rotation=45, ha='right')
+        _rotate_labels(ax.get_xticklabels())
     
     # Add grid
     ax.yaxis.grid(True, linestyle='--', alpha=0.3)
     ax.set_axisbelow(True)
     
     # Format y-axis as currency
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-    
-    # Save to BytesIO
-    img_buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
-    plt.close()
+    _currency_axis(ax.yaxis)
     
-    img_buffer.seek(0)
-    return Image(img_buffer, width=5.5*72, height=3*72)  # 5.5 x 3 inches
+    return _figure_png(fig)
 
-def create_trend_chart(expenses, title="Spending Trend"):
-    """Create a line chart showing spending over time"""
-    if not expenses:
+def _dated_totals(daily_totals):
+    """Yield (date, amount) pairs from a {'YYYY-MM-DD': amount} dict, skipping undated totals"""
+    for day, amount in daily_totals.items():
+        try:
+            yield datetime.strptime(day, '%Y-%m-%d'), amount
+        except (TypeError, ValueError):
+            continue
+
+def create_trend_chart(daily_totals, title="Spending Trend", backend='matplotlib', executor=None):
+    """Create a line chart showing spending over time from {'YYYY-MM-DD': amount} totals"""
+    if not daily_totals:
         return None
     
-    # Group expenses by month
+    # Group totals by month
     monthly_data = defaultdict(float)
-    for expense in expenses:
-        if expense.date:
-            month_key = expense.date.strftime('%Y-%m')
-            monthly_data[month_key] += expense.cost or 0
+    for day, amount in _dated_totals(daily_totals):
+        monthly_data[day.strftime('%Y-%m')] += amount
     
     if not monthly_data:
         return None
     
-    # Sort by date
+    # Sort by date; the chart only depends on the monthly totals, so they are the cache key
     sorted_months = sorted(monthly_data.items())
-    
-    # Prepare data
-    months = []
-    values = []
-    for month_str, value in sorted_months:
+    if backend == 'vector':
+        return _vector_trend_chart(sorted_months, title)
+    return _cached_chart('trend', sorted_months, title, (8, 4), (5.5*72, 3*72),  # 5.5 x 3 inches
+                         _render_trend_chart, (sorted_months, title), executor)
+
+def _month_labels(sorted_months):
+    """('2024-01', total) pairs -> ['Jan 24', ...]"""
+    labels = []
+    for month_str, _ in sorted_months:
         year, month = month_str.split('-')
-        months.append(f"{calendar.month_abbr[int(month)]} {year[-2:]}")
-        values.append(value)
+        labels.append(f"{calendar.month_abbr[int(month)]} {year[-2:]}")
+    return labels
+
+def _render_trend_chart(sorted_months, title):
+    # Prepare data
+    months = _month_labels(sorted_months)
+    values = [value for _, value in sorted_months]
     
-    fig, ax = plt.subplots(figsize=(8, 4))
+    fig, ax = _figure((8, 4))
     
     # Create line chart with markers
     ax.plot(months, values, color='#0d6efd', linewidth=2, marker='o', 
@@ -147,7 +387,7 @@ def create_trend_chart(expenses, title="Spending Trend"):
     
     # Rotate x labels if many months
     if len(months) > 6:
-        plt.xticks(rotation=45, ha='right')
+        _rotate_labels(ax.get_xticklabels())
     
     # Add grid
     ax.yaxis.grid(True, linestyle='--', alpha=0.3)
@@ -155,22 +395,171 @@ def create_trend_chart(expenses, title="Spending Trend"):
     ax.set_axisbelow(True)
     
     # Format y-axis as currency
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    _currency_axis(ax.yaxis)
     
-    # Save to BytesIO
-    img_buffer = BytesIO()
-    plt.tight_layout()
-    plt.savefig(img_buffer, format='png', dpi=100, bbox_inches='tight')
-    plt.close()
+    return _figure_png(fig)
+
+def _currency(value):
+    return f'${value:,.0f}'
+
+def _chart_title(drawing, title):
+    drawing.add(String(drawing.width / 2, drawing.height - 14, title, textAnchor='middle',
+                       fontName='Helvetica-Bold', fontSize=12, fillColor=colors.HexColor(PRIMARY_COLOR)))
+
+def _vector_pie_chart(data_dict, title):
+    drawing = Drawing(4*72, 4*72)
+    _chart_title(drawing, title)
+    slices = _top_slices(data_dict)
+    total = sum(v for _, v in slices) or 1
+    
+    pie = Pie()
+    pie.x, pie.y = 72, 60
+    pie.width = pie.height = 144
+    pie.data = [v for _, v in slices]
+    pie.labels = [f"{k} {_currency(v)} ({v / total:.0%})" for k, v in slices]
+    pie.sideLabels = True
+    pie.simpleLabels = False
+    pie.startAngle = 90
+    pie.direction = 'clockwise'
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    pie.slices.fontSize = 7
+    for i in range(len(slices)):
+        pie.slices[i].fillColor = colors.HexColor(CHART_COLORS[i % len(CHART_COLORS)])
+    drawing.add(pie)
+    drawing.hAlign = 'CENTER'
+    return drawing
+
+def _vector_bar_chart(data_dict, title):
+    drawing = Drawing(5.5*72, 3*72)
+    _chart_title(drawing, title)
+    sorted_data = sorted(data_dict.items(), key=lambda x: x[1], reverse=True)
     
-    img_buffer.seek(0)
-    return Image(img_buffer, width=5.5*72, height=3*72)  # 5.5 x 3 inches
+    chart = VerticalBarChart()
+    chart.x, chart.y = 55, 45
+    chart.width, chart.height = drawing.width - 75, drawing.height - 80
+    chart.data = [[v for _, v in sorted_data]]
+    chart.categoryAxis.categoryNames = [k for k, _ in sorted_data]
+    chart.categoryAxis.labels.fontSize = 8
+    if len(sorted_data) > 5:
+        chart.categoryAxis.labels.angle = 45
+        chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.labelTextFormat = _currency
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor('#dee2e6')
+    chart.valueAxis.gridStrokeDashArray = (2, 2)
+    chart.bars[0].fillColor = colors.HexColor(PRIMARY_COLOR)
+    chart.bars[0].strokeColor = colors.HexColor('#0a58ca')
+    chart.barLabelFormat = _currency
+    chart.barLabels.fontSize = 8
+    chart.barLabels.nudge = 7
+    drawing.add(chart)
+    drawing.hAlign = 'CENTER'
+    return drawing
+
+def _vector_trend_chart(sorted_months, title):
+    drawing = Drawing(5.5*72, 3*72)
+    _chart_title(drawing, title)
+    primary = colors.HexColor(PRIMARY_COLOR)
+    
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 55, 45
+    chart.width, chart.height = drawing.width - 75, drawing.height - 80
+    chart.data = [[value for _, value in sorted_months]]
+    chart.categoryAxis.categoryNames = _month_labels(sorted_months)
+    chart.categoryAxis.labels.fontSize = 8
+    if len(sorted_months) > 6:
+        chart.categoryAxis.labels.angle = 45
+        chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.labelTextFormat = _currency
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor('#dee2e6')
+    chart.valueAxis.gridStrokeDashArray = (2, 2)
+    chart.joinedLines = 1
+    chart.inFill = 1
+    chart.lines[0].strokeColor = primary
+    chart.lines[0].strokeWidth = 2
+    chart.lines[0].fillColor = colors.Color(primary.red, primary.green, primary.blue, alpha=0.2)
+    chart.lines[0].symbol = makeMarker('Circle', size=5, fillColor=colors.white, strokeColor=primary)
+    chart.lineLabelFormat = _currency
+    chart.lineLabels.fontSize = 7
+    chart.lineLabelNudge = 8
+    drawing.add(chart)
+    drawing.hAlign = 'CENTER'
+    return drawing
+
+class SegmentedTable(Flowable):
+    """A table fed from a row iterator and laid out as one page-sized LongTable per page.
+
+    Platypus splits a single Table by rebuilding and re-measuring all of its
+    remaining rows on every page, which grows quadratically with the row
+    count. Here only about a page worth of rows is pulled from ``rows`` and
+    measured at a time (``batch_rows`` until the row height is known), so
+    layout time stays linear and finished pages are not held in memory.
+    Every page starts with ``header``, and all segments share one ``style``.
+    ``tail()`` is called once the rows run out and returns flowables to place
+    after the table, e.g. totals gathered while the rows streamed by.
+    """
+
+    def __init__(self, header, rows, col_widths, style, batch_rows=150, tail=None):
+        Flowable.__init__(self)
+        self.header = header
+        self.rows = iter(rows)
+        self.col_widths = col_widths
+        self.style = style
+        self.batch_rows = batch_rows
+        self.tail = tail
+        self._pending = []
+        self._exhausted = False
+        self._row_height = None
+
+    def _pull(self, count):
+        while not self._exhausted and len(self._pending) < count:
+            row = next(self.rows, None)
+            if row is None:
+                self._exhausted = True
+            else:
+                self._pending.append(row)
+
+    def _finish(self):
+        return (self.tail() if self.tail else []) or [Spacer(0, 0)]
+
+    def wrap(self, availWidth, availHeight):
+        # Always taller than the frame, so platypus asks split() for each page
+        return sum(self.col_widths), availHeight + 1
+
+    def split(self, availWidth, availHeight):
+        # Rows are at least _row_height tall, so this is at least as many as can fit
+        self._pull(int(availHeight / self._row_height) + 1 if self._row_height else self.batch_rows)
+        if not self._pending:
+            return self._finish()
+        segment = LongTable([self.header] + self._pending, colWidths=self.col_widths,
+                            repeatRows=1, style=self.style)
+        parts = segment.split(availWidth, availHeight)
+        if not parts:
+            # Not even one row fits below what is already on this page
+            return []
+        # The first part holds the header and the rows that fit; the rest wait for the next page
+        fitted = len(parts[0]._cellvalues) - 1
+        if fitted == len(self._pending) and self._exhausted:
+            return [parts[0]] + self._finish()
+        # Like Table.split, hand back a new flowable for the rest rather than self
+        rest = SegmentedTable(self.header, self.rows, self.col_widths, self.style, self.batch_rows, self.tail)
+        rest._pending = self._pending[fitted:]
+        rest._exhausted = self._exhausted
+        rest._row_height = self._row_height or min(segment._rowHeights[1:])
+        return [parts[0], FrameBreak(), rest]
+
+    def draw(self):
+        pass
 
-def calculate_monthly_breakdown(expenses):
-    """Calculate monthly spending breakdown"""
+def calculate_monthly_breakdown(daily_totals):
+    """Calculate monthly spending breakdown from {'YYYY-MM-DD': amount} totals"""
     monthly_data = defaultdict(float)
-    for expense in expenses:
-        if expense.date:
-            month_key = expense.date.strftime('%B %Y')
-            monthly_data[month_key] += expense.cost or 0
+    for day, amount in _dated_totals(daily_totals):
+        monthly_data[day.strftime('%B %Y')] += amount
     return dict(monthly_data)
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Content-addressed on-disk storage for expense receipts.
+
+Receipts are stored once per unique content under a sharded directory tree
+keyed by their SHA-256 digest, e.g. ``data/receipts/ab/cd/abcd...``.
+The database only keeps the digest, size and mimetype of each receipt.
+"""
+import os
+import hashlib
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+# Bounding-box sizes (in pixels) of the WebP previews generated for image receipts
+THUMBNAIL_SIZES = (160, 800)
+
+
+class ReceiptStore:
+    """Sharded, deduplicating receipt file store"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        """Return the absolute file path for a receipt digest"""
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return bool(digest) and os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store receipt bytes and return their (digest, size).
+
+        Identical content is only written once; later writes of the same
+        bytes return the existing digest without touching the disk.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path(digest)
+        if not os.path.exists(target):
+            shard_dir = os.path.dirname(target)
+            os.makedirs(shard_dir, exist_ok=True)
+            # Write to a temp file in the same directory so the final rename is atomic
+            fd, tmp_path = tempfile.mkstemp(dir=shard_dir, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, target)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return digest, len(data)
+
+    def put_stream(self, stream):
+        """Store a file-like object without reading it fully into memory"""
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            target = self.path(digest)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, size
+
+    def open(self, digest):
+        """Open a stored receipt for binary reading"""
+        return open(self.path(digest), 'rb')
+
+    def delete(self, digest):
+        """Remove a stored receipt, ignoring files that are already gone"""
+        if not digest:
+            return
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+
+class ThumbnailCache:
+    """Size-bounded on-disk cache of WebP previews keyed by receipt digest.
+
+    Previews are rendered on first use and evicted least-recently-used first
+    once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._approx_bytes = None
+
+    def path(self, digest, size):
+        return os.path.join(self.root, digest[:2], f"{digest}-{size}.webp")
+
+    def get(self, digest, size, source_path):
+        """Return the path of a preview, rendering it from source_path if needed"""
+        target = self.path(digest, size)
+        if os.path.exists(target):
+            # Touch the file so eviction sees it as recently used
+            os.utime(target)
+            return target
+
+        # PIL is only loaded by workers that actually render a preview
+        from PIL import Image, ImageOps
+        shard_dir = os.path.dirname(target)
+        os.makedirs(shard_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=shard_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f, Image.open(source_path) as img:
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((size, size))
+                if img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+                img.save(f, 'WEBP', quality=80, method=4)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._track(os.path.getsize(target))
+        return target
+
+    def _track(self, added_bytes):
+        if self._approx_bytes is None:
+            self._approx_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._approx_bytes += added_bytes
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.webp'):
+                    full_path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except FileNotFoundError:
+                        continue
+                    yield full_path, stat.st_mtime, stat.st_size
+
+    def evict(self, target_ratio=0.9):
+        """Delete least-recently-used previews until the cache is below target_ratio of max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        limit = self.max_bytes * target_ratio
+        for full_path, _, size in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(full_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._approx_bytes = total
+
+    def delete(self, digest):
+        """Remove all previews of a receipt"""
+        for size in THUMBNAIL_SIZES:
+            try:
+                os.remove(self.path(digest, size))
+            except FileNotFoundError:
+                pass
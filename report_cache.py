@@ -0,0 +1,105 @@
+"""
+Size-bounded on-disk cache of rendered PDF reports.
+
+A report is keyed by a hash of its normalized options and the version of the
+data it was rendered from. Repeating a request with the same options is then
+served straight from the file until the next write changes the data version.
+Reports are evicted least-recently-used first once the cache grows past
+``max_bytes``. All workers and report processes share the directory. Files
+only ever appear through an atomic rename, so readers never see a partly
+written PDF.
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+# Unfinished renders older than this (seconds) are left over from a crash and removed on eviction
+STALE_TEMP_AGE = 3600
+
+
+class ReportCache:
+    """Rendered reports keyed by options and data version"""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._approx_bytes = None
+
+    @staticmethod
+    def make_key(options, data_version):
+        payload = json.dumps({'options': options, 'data_version': data_version}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    def get(self, key):
+        """Return the path of a cached report, or None"""
+        target = self.path(key)
+        if os.path.exists(target):
+            # Touch the file so eviction sees it as recently used
+            os.utime(target)
+            return target
+        return None
+
+    def temp_path(self):
+        """A fresh file to render into before handing it to put()"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-', suffix='.pdf')
+        os.close(fd)
+        return tmp_path
+
+    def put(self, key, rendered_path):
+        """Move a rendered report into the cache and return its cached path"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(rendered_path, target)
+        self._track(os.path.getsize(target))
+        return target
+
+    def _track(self, added_bytes):
+        if self._approx_bytes is None:
+            self._approx_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._approx_bytes += added_bytes
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.pdf') and not name.startswith('.'):
+                    full_path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(full_path)
+                    except FileNotFoundError:
+                        continue
+                    yield full_path, stat.st_mtime, stat.st_size
+
+    def _remove_stale_temp_files(self):
+        cutoff = time.time() - STALE_TEMP_AGE
+        for entry in os.scandir(self.root):
+            if entry.name.startswith('.tmp-'):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, target_ratio=0.9):
+        """Delete least-recently-used reports until the cache is below target_ratio of max_bytes"""
+        self._remove_stale_temp_files()
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        limit = self.max_bytes * target_ratio
+        for full_path, _, size in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(full_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._approx_bytes = total
@@ -0,0 +1,490 @@
+"""
+Cross-worker result cache for JSON API responses.
+
+Every gunicorn worker reads and writes the same backend, and each cache
+key is prefixed with the global data generation current when the key was
+built, i.e. before the result is computed. A write anywhere bumps the
+generation, which invalidates every worker's entries at once without
+scanning or deleting them; entries of old generations are purged along
+with expired ones.
+
+The SQLite and memory backends are bounded by entry count and by the
+approximate size of the serialized values, and evict least-recently-used
+entries once either limit is exceeded. With Redis the size bound is left
+to the server's ``maxmemory``/``maxmemory-policy allkeys-lru`` settings.
+
+Hits, misses, sets, evictions and expirations are counted per endpoint
+(the second component of the key) and shared by all workers, so the
+numbers reported by ``ResultCache.stats()`` cover the whole deployment.
+The SQLite backend keeps its read path read-only: hit/miss counts and
+LRU access times are batched in memory and written with the next set, or
+at most every ``FLUSH_INTERVAL`` seconds.
+
+The cache is an optimization only. ``ResultCache`` treats a failing
+backend (a locked or unreadable cache file, an unreachable Redis) as a
+miss and lets the caller compute the result.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+
+STAT_FIELDS = ('hits', 'misses', 'sets', 'evictions', 'expirations')
+
+
+def split_key(key):
+    """Return the (generation, endpoint) a cache key was built for"""
+    generation, endpoint, _ = key.split(':', 2)
+    return int(generation), endpoint
+
+
+class SQLiteCacheBackend:
+    """Cache stored in a small SQLite file shared by all workers on a host"""
+
+    name = 'sqlite'
+
+    # Bump when the table layout changes; the cache is simply recreated
+    SCHEMA_VERSION = 2
+    # Expired and old-generation rows are purged at most this often (seconds)
+    PURGE_INTERVAL = 60
+    # Hit/miss counts and access times batched by reads are written at least this often (seconds)
+    FLUSH_INTERVAL = 10
+
+    def __init__(self, path, max_entries, max_bytes):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._last_purge = 0
+        self._pending_lock = threading.Lock()
+        self._reset_pending()
+
+    def _reset_pending(self):
+        self._pending_pid = os.getpid()
+        self._pending_counts = defaultdict(lambda: defaultdict(int))  # endpoint -> field -> n
+        self._pending_access = {}  # key -> last accessed_at
+        self._last_flush = time.time()
+
+    def _connection(self):
+        # Connections are per thread and are never reused across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                conn.execute("BEGIN IMMEDIATE")
+                if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS cache_entry")
+                    conn.execute("""
+                        CREATE TABLE cache_entry (
+                            key TEXT PRIMARY KEY,
+                            endpoint TEXT NOT NULL,
+                            generation INTEGER NOT NULL,
+                            value TEXT NOT NULL,
+                            size INTEGER NOT NULL,
+                            expires_at REAL NOT NULL,
+                            accessed_at REAL NOT NULL
+                        )
+                    """)
+                    conn.execute("CREATE INDEX ix_cache_entry_accessed_at ON cache_entry (accessed_at)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                    conn.execute("INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('generation', 0)")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS cache_stats (
+                            endpoint TEXT PRIMARY KEY,
+                            hits INTEGER NOT NULL DEFAULT 0,
+                            misses INTEGER NOT NULL DEFAULT 0,
+                            sets INTEGER NOT NULL DEFAULT 0,
+                            evictions INTEGER NOT NULL DEFAULT 0,
+                            expirations INTEGER NOT NULL DEFAULT 0
+                        )
+                    """)
+                    conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+                conn.execute("COMMIT")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _record(self, conn, counts):
+        """Add {endpoint: {field: n}} to the shared counters"""
+        for endpoint, fields in counts.items():
+            conn.execute("INSERT OR IGNORE INTO cache_stats (endpoint) VALUES (?)", (endpoint,))
+            assignments = ', '.join(f"{field} = {field} + ?" for field in fields)
+            conn.execute(f"UPDATE cache_stats SET {assignments} WHERE endpoint = ?",
+                         (*fields.values(), endpoint))
+
+    def get_generation(self):
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self):
+        self._connection().execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'")
+
+    def _note_read(self, key, endpoint, hit, now):
+        with self._pending_lock:
+            if self._pending_pid != os.getpid():
+                # Counts inherited over a fork belong to the parent
+                self._reset_pending()
+            self._pending_counts[endpoint]['hits' if hit else 'misses'] += 1
+            if hit:
+                self._pending_access[key] = now
+            return now - self._last_flush > self.FLUSH_INTERVAL
+
+    def _take_pending(self):
+        with self._pending_lock:
+            if self._pending_pid != os.getpid():
+                self._reset_pending()
+            counts, access = self._pending_counts, self._pending_access
+            self._pending_counts = defaultdict(lambda: defaultdict(int))
+            self._pending_access = {}
+            self._last_flush = time.time()
+            return counts, access
+
+    def _restore_pending(self, counts, access):
+        """Put batched reads back after a failed flush so they are written next time"""
+        with self._pending_lock:
+            for endpoint, fields in counts.items():
+                for field, count in fields.items():
+                    self._pending_counts[endpoint][field] += count
+            for key, accessed_at in access.items():
+                self._pending_access[key] = max(accessed_at, self._pending_access.get(key, 0))
+
+    def _flush(self, conn):
+        """Write the batched hit/miss counts and access times; call inside a write transaction"""
+        counts, access = self._take_pending()
+        try:
+            if access:
+                conn.executemany("UPDATE cache_entry SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                                 [(accessed_at, key) for key, accessed_at in access.items()])
+            self._record(conn, counts)
+        except Exception:
+            self._restore_pending(counts, access)
+            raise
+        return counts, access
+
+    def _write(self, work):
+        """Run work(conn) in one IMMEDIATE transaction together with the batched reads"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            flushed = self._flush(conn)
+            try:
+                result = work(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                self._restore_pending(*flushed)
+                raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def get(self, key, endpoint):
+        # A plain autocommit SELECT: reads never take the write lock
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value FROM cache_entry WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if self._note_read(key, endpoint, row is not None, now):
+            try:
+                self._write(lambda conn: None)
+            except sqlite3.OperationalError:
+                # Busy: the batch stays pending and goes out with the next write
+                pass
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, endpoint, generation, value, timeout):
+        now = time.time()
+        payload = json.dumps(value)
+        
+        def store(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, endpoint, generation, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, generation, payload, len(payload), now + timeout, now)
+            )
+            self._record(conn, {endpoint: {'sets': 1}})
+            if now - self._last_purge > self.PURGE_INTERVAL:
+                self._last_purge = now
+                self._purge(conn, now)
+            self._enforce_limits(conn)
+        
+        self._write(store)
+
+    def _purge(self, conn, now):
+        """Drop expired and old-generation entries"""
+        generation = conn.execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()[0]
+        stale = "expires_at <= ? OR generation < ?"
+        expired = conn.execute(
+            f"SELECT endpoint, COUNT(*) FROM cache_entry WHERE {stale} GROUP BY endpoint", (now, generation)
+        ).fetchall()
+        if expired:
+            conn.execute(f"DELETE FROM cache_entry WHERE {stale}", (now, generation))
+            self._record(conn, {endpoint: {'expirations': count} for endpoint, count in expired})
+
+    def _enforce_limits(self, conn):
+        """Evict least-recently-used entries until both limits are met"""
+        entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        victims = []
+        evicted = defaultdict(lambda: {'evictions': 0})
+        for key, endpoint, size in conn.execute("SELECT key, endpoint, size FROM cache_entry ORDER BY accessed_at"):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            evicted[endpoint]['evictions'] += 1
+            entries -= 1
+            total_bytes -= size
+        conn.executemany("DELETE FROM cache_entry WHERE key = ?", victims)
+        self._record(conn, evicted)
+
+    def purge(self):
+        self._write(lambda conn: self._purge(conn, time.time()))
+
+    def stats(self):
+        conn = self._connection()
+        endpoints = {
+            row[0]: dict(zip(STAT_FIELDS, row[1:]))
+            for row in conn.execute(f"SELECT endpoint, {', '.join(STAT_FIELDS)} FROM cache_stats ORDER BY endpoint")
+        }
+        entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry").fetchone()
+        return {
+            'backend': self.name,
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'endpoints': endpoints,
+        }
+
+    def reset_stats(self):
+        self._take_pending()
+        self._connection().execute("DELETE FROM cache_stats")
+
+
+class RedisCacheBackend:
+    """Cache stored in Redis; pass a client (e.g. fakeredis.FakeRedis()) or a URL.
+
+    Entries carry a TTL, so expiry is handled by Redis itself. Memory is
+    bounded by the server's maxmemory policy, which also does the LRU
+    eviction; Redis does not report evictions per key prefix, so they are
+    not counted per endpoint here.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client=None, url=None, prefix='pcs:cache:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError('CACHE_BACKEND=redis needs the redis package; '
+                                   'install it with pip install -r requirements-redis.txt') from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _record(self, endpoint, field):
+        self.client.hincrby(f"{self.prefix}stats:{endpoint}", field, 1)
+
+    def get_generation(self):
+        value = self.client.get(self.prefix + 'generation')
+        return int(value) if value is not None else 0
+
+    def bump_generation(self):
+        self.client.incr(self.prefix + 'generation')
+
+    def get(self, key, endpoint):
+        value = self.client.get(self.prefix + key)
+        self._record(endpoint, 'hits' if value is not None else 'misses')
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, endpoint, generation, value, timeout):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(timeout))
+        self._record(endpoint, 'sets')
+
+    def purge(self):
+        pass
+
+    def stats(self):
+        endpoints = {}
+        for stats_key in self.client.scan_iter(match=f"{self.prefix}stats:*"):
+            if isinstance(stats_key, bytes):
+                stats_key = stats_key.decode()
+            counters = {
+                (field.decode() if isinstance(field, bytes) else field): int(count)
+                for field, count in self.client.hgetall(stats_key).items()
+            }
+            endpoints[stats_key[len(self.prefix) + len('stats:'):]] = {
+                field: counters.get(field, 0) for field in STAT_FIELDS
+            }
+        return {'backend': self.name, 'endpoints': dict(sorted(endpoints.items()))}
+
+    def reset_stats(self):
+        for stats_key in self.client.scan_iter(match=f"{self.prefix}stats:*"):
+            self.client.delete(stats_key)
+
+
+class MemoryCacheBackend:
+    """Per-process LRU cache; only suitable for a single worker (development, tests)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (endpoint, expires_at, size, value)
+        self.total_bytes = 0
+        self.generation = 0
+        self.counters = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def get_generation(self):
+        return self.generation
+
+    def bump_generation(self):
+        with self._lock:
+            self.generation += 1
+            for endpoint, *_ in self.entries.values():
+                self.counters[endpoint]['expirations'] += 1
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key, reason):
+        endpoint, _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+        self.counters[endpoint][reason] += 1
+
+    def get(self, key, endpoint):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] <= time.time():
+                self._remove(key, 'expirations')
+                entry = None
+            if entry is None:
+                self.counters[endpoint]['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters[endpoint]['hits'] += 1
+            return entry[3]
+
+    def set(self, key, endpoint, generation, value, timeout):
+        size = len(json.dumps(value))
+        with self._lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[2]
+            self.entries[key] = (endpoint, time.time() + timeout, size, value)
+            self.total_bytes += size
+            self.counters[endpoint]['sets'] += 1
+            self._purge(time.time())
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self.entries)), 'evictions')
+
+    def _purge(self, now):
+        for key in [key for key, entry in self.entries.items() if entry[1] <= now]:
+            self._remove(key, 'expirations')
+
+    def purge(self):
+        with self._lock:
+            self._purge(time.time())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'endpoints': {endpoint: dict(counts) for endpoint, counts in sorted(self.counters.items())},
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.counters.clear()
+
+
+class ResultCache:
+    """Generation-aware cache front end used by the API routes.
+
+    Backend failures never reach the routes: a key that cannot be built or
+    read is a miss, and a result that cannot be stored is simply not cached.
+    """
+
+    def __init__(self, backend, timeout):
+        self.backend = backend
+        self.timeout = timeout
+        self._failing = False
+
+    def _call(self, method, *args, default=None):
+        try:
+            result = method(*args)
+        except Exception as e:
+            # Logged once per outage rather than on every request
+            if not self._failing:
+                print(f"Worker {os.getpid()}: ⚠ Result cache unavailable, computing results without it: {e}")
+            self._failing = True
+            return default
+        if self._failing:
+            print(f"Worker {os.getpid()}: ✓ Result cache available again")
+            self._failing = False
+        return result
+
+    def make_key(self, endpoint, params_str):
+        """Build a key bound to the current data generation, or None if the backend is unavailable"""
+        generation = self._call(self.backend.get_generation)
+        return f"{generation}:{endpoint}:{params_str}" if generation is not None else None
+
+    def get(self, key):
+        if key is None:
+            return None
+        return self._call(self.backend.get, key, split_key(key)[1])
+
+    def set(self, key, value):
+        if key is None:
+            return
+        generation, endpoint = split_key(key)
+        self._call(self.backend.set, key, endpoint, generation, value, self.timeout)
+
+    def invalidate(self):
+        """Invalidate every cached result in all workers"""
+        self._call(self.backend.bump_generation)
+
+    def generation(self):
+        """Current data generation; changes whenever invalidate() is called (None if unavailable)"""
+        return self._call(self.backend.get_generation)
+
+    def stats(self):
+        """Return usage and per-endpoint counters, with a hit ratio per endpoint.
+
+        With the backend unavailable the counters are empty and ``available`` is False.
+        """
+        self._call(self.backend.purge)
+        stats = self._call(self.backend.stats)
+        if stats is None:
+            stats = {'backend': self.backend.name, 'available': False, 'endpoints': {}}
+        else:
+            stats['available'] = True
+        for counts in stats['endpoints'].values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / lookups, 3) if lookups else None
+        stats['timeout'] = self.timeout
+        stats['generation'] = self.generation()
+        return stats
+
+    def reset_stats(self):
+        self._call(self.backend.reset_stats)
+
+
+def create_backend(kind, data_dir, redis_url=None, max_entries=1000, max_bytes=32 * 1024 * 1024):
+    """Build the cache backend named by the CACHE_BACKEND setting"""
+    if kind == 'redis':
+        return RedisCacheBackend(url=redis_url)
+    if kind == 'memory':
+        return MemoryCacheBackend(max_entries, max_bytes)
+    return SQLiteCacheBackend(os.path.join(data_dir, 'cache.db'), max_entries, max_bytes)
@@ -0,0 +1,113 @@
+"""
+SQLite connection profile for running several gunicorn workers on one file.
+
+Every new DBAPI connection gets the configured pragmas (WAL journal, busy
+timeout, synchronous level, mmap, page cache and temp store), and write
+routes can be wrapped with ``retry_on_locked`` so the rare SQLITE_BUSY that
+the busy timeout cannot absorb (e.g. a read transaction upgrading to a
+write after another worker committed) is retried with backoff instead of
+surfacing as "database is locked".
+"""
+import time
+import random
+import functools
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+# Applied in this order; journal_mode first so later pragmas act on the WAL connection
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,         # milliseconds
+    'synchronous': 'NORMAL',      # safe with WAL; only the last commits can be lost on power failure
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -8000,          # negative = KiB, i.e. ~8MB per connection
+    'temp_store': 'MEMORY',
+}
+
+ALLOWED_VALUES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+# How PRAGMA reads report enumerated settings
+SYNCHRONOUS_NAMES = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+TEMP_STORE_NAMES = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+
+def pragmas_from_env(environ):
+    """Build the pragma profile from SQLITE_* environment variables"""
+    pragmas = {}
+    for name, default in DEFAULT_PRAGMAS.items():
+        value = environ.get(f'SQLITE_{name.upper()}', default)
+        if name in ALLOWED_VALUES:
+            value = str(value).upper()
+            if value not in ALLOWED_VALUES[name]:
+                raise ValueError(f"Invalid SQLITE_{name.upper()}: {value}")
+        else:
+            value = int(value)
+        pragmas[name] = value
+    return pragmas
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def install(engine, pragmas):
+    """Apply pragmas to every connection the engine opens from now on"""
+    @event.listens_for(engine, 'connect')
+    def _apply_sqlite_profile(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def effective_settings(connection):
+    """Read back the settings actually in effect on a DBAPI connection"""
+    settings = {}
+    for name in DEFAULT_PRAGMAS:
+        value = connection.execute(f"PRAGMA {name}").fetchone()[0]
+        if name == 'synchronous':
+            value = SYNCHRONOUS_NAMES.get(value, value)
+        elif name == 'temp_store':
+            value = TEMP_STORE_NAMES.get(value, value)
+        elif name == 'journal_mode':
+            value = value.upper()
+        settings[name] = value
+    return settings
+
+
+def is_locked_error(error):
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'busy' in message
+
+
+def retry_on_locked(rollback, attempts=3, base_delay=0.05, before_retry=None):
+    """Decorator that re-runs a write unit of work when SQLite reports it is locked.
+
+    ``rollback`` resets the session between attempts and ``before_retry``
+    can restore any other per-attempt state (e.g. rewind uploaded files).
+    Delays grow exponentially from ``base_delay`` with random jitter so
+    competing workers do not retry in lockstep.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as e:
+                    if attempt == attempts - 1 or not is_locked_error(e):
+                        raise
+                    rollback()
+                    if before_retry:
+                        before_retry()
+                    time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long a worker takes to import the app and how much
+memory it holds afterwards.
+
+Each run imports the app in a fresh interpreter, as a gunicorn worker does,
+and records the import wall time, the resident set size and which of the
+heavy optional libraries got loaded. None of them should be: pandas,
+openpyxl, ReportLab, matplotlib and PIL are only imported by the import,
+export, report and receipt code that needs them.
+
+Usage:
+    python startup_benchmark.py [--runs 5] [--init] [--json]
+
+Database initialization is skipped unless --init is given, so only the
+import itself is measured. Run it next to an existing data/ directory.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'reportlab', 'matplotlib', 'PIL')
+
+# Runs inside the child interpreter and prints one JSON line
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+rss_kb = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'import_seconds': elapsed, 'rss_mb': rss_kb / 1024,
+                  'loaded': [name for name in %r if name in sys.modules]}))
+''' % (HEAVY_MODULES,)
+
+
+def measure(init=False):
+    env = dict(os.environ)
+    if not init:
+        env['PCS_DB_INITIALIZED'] = 'true'
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, check=True)
+    # The app logs to stdout while importing; the probe's JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app import time and RSS per worker')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to measure (default 5)')
+    parser.add_argument('--init', action='store_true', help='include database initialization')
+    parser.add_argument('--json', action='store_true', help='print the raw measurements as JSON')
+    args = parser.parse_args()
+
+    runs = [measure(args.init) for _ in range(args.runs)]
+    summary = {
+        'runs': len(runs),
+        'import_seconds_median': statistics.median(run['import_seconds'] for run in runs),
+        'rss_mb_median': statistics.median(run['rss_mb'] for run in runs),
+        'loaded': sorted({name for run in runs for name in run['loaded']}),
+    }
+
+    if args.json:
+        print(json.dumps({'summary': summary, 'runs': runs}, indent=2))
+        return
+
+    for number, run in enumerate(runs, 1):
+        print(f"Run {number}: {run['import_seconds']:.3f}s, {run['rss_mb']:.1f} MB RSS")
+    print(f"Median: {summary['import_seconds_median']:.3f}s, {summary['rss_mb_median']:.1f} MB RSS per worker")
+    if summary['loaded']:
+        print(f"⚠ Heavy modules loaded at import: {', '.join(summary['loaded'])}")
+    else:
+        print("✅ No heavy modules loaded at import")
+
+
+if __name__ == '__main__':
+    main()
@@ -45,8 +45,8 @@ class DashboardBuilder {
         });
     }
     
-    addWidget(type, title, size = 'medium') {
-        const widgetId = 'widget-' + Date.now();
+    addWidget(type, title, size = 'medium', refresh = true) {
+        const widgetId = 'widget-' + Date.now() + '-' + this.widgets.length;
         const widget = {
             id: widgetId,
             type: type,
@@ -56,7 +56,9 @@ class DashboardBuilder {
         
         this.widgets.push(widget);
         this.renderWidget(widget);
-        this.updateWidgetData(widget);
+        if (refresh) {
+            this.refreshWidgets([widget]);
+        }
     }
     
     renderWidget(widget) {
@@ -94,240 +96,191 @@ class DashboardBuilder {
         dashboardPreview.appendChild(widgetElement);
     }
     
-    updateWidgetData(widget) {
+    refreshWidgets(widgets = this.widgets) {
         const filters = this.getActiveFilters();
-        
-        // For chart widgets, fetch data and render
-        if (widget.type.includes('pie') || widget.type.includes('bar') || 
-            widget.type.includes('line') || widget.type.includes('area')) {
-            this.fetchAndRenderChart(widget, filters);
-        } else {
-            // For stat widgets, fetch specific data
-            this.fetchWidgetData(widget, filters);
+        if (widgets.length === 0) {
+            return;
         }
-    }
-    
-    fetchAndRenderChart(widget, filters) {
-        const params = new URLSearchParams(filters);
         
-        fetch(`/api/expense_data?${params}`)
-            .then(response => response.json())
-            .then(data => {
-                const contentEl = document.getElementById(`${widget.id}-content`);
-                contentEl.innerHTML = `<canvas id="${widget.id}-chart"></canvas>`;
-                
-                const ctx = document.getElementById(`${widget.id}-chart`).getContext('2d');
-                let chartConfig = {};
-                
-                if (widget.type === 'category-pie') {
-                    chartConfig = {
-                        type: 'pie',
-                        data: {
-                            labels: data.categories.labels,
-                            datasets: [{
-                                data: data.categories.data,
-                                backgroundColor: this.generateColors(data.categories.labels.length)
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'category-bar') {
-                    chartConfig = {
-                        type: 'bar',
-                        data: {
-                            labels: data.categories.labels,
-                            datasets: [{
-                                label: 'Amount',
-                                data: data.categories.data,
-                                backgroundColor: '#0d6efd'
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'payment-pie') {
-                    chartConfig = {
-                        type: 'pie',
-                        data: {
-                            labels: data.payment_methods.labels,
-                            datasets: [{
-                                data: data.payment_methods.data,
-                                backgroundColor: this.generateColors(data.payment_methods.labels.length)
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'payment-bar') {
-                    chartConfig = {
-                        type: 'bar',
-                        data: {
-                            labels: data.payment_methods.labels,
-                            datasets: [{
-                                label: 'Amount',
-                                data: data.payment_methods.data,
-                                backgroundColor: '#28a745'
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'trend-line') {
-                    chartConfig = {
-                        type: 'line',
-                        data: {
-                            labels: data.daily_trend.labels,
-                            datasets: [{
-                                label: 'Daily Spending',
-                                data: data.daily_trend.data,
-                                borderColor: '#0d6efd',
-                                backgroundColor: 'rgba(13, 110, 253, 0.1)',
-                                tension: 0.1
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'trend-area') {
-                    chartConfig = {
-                        type: 'line',
-                        data: {
-                            labels: data.daily_trend.labels,
-                            datasets: [{
-                                label: 'Daily Spending',
-                                data: data.daily_trend.data,
-                                borderColor: '#0d6efd',
-                                backgroundColor: 'rgba(13, 110, 253, 0.3)',
-                                fill: true,
-                                tension: 0.1
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
-                } else if (widget.type === 'reimbursement-breakdown') {
-                    const reimbursementData = [
-                        data.reimbursement_stats.pending,
-                        data.reimbursement_stats.approved,
-                        data.reimbursement_stats.received
-                    ];
-                    chartConfig = {
-                        type: 'doughnut',
-                        data: {
-                            labels: ['Pending', 'Approved', 'Received'],
-                            datasets: [{
-                                data: reimbursementData,
-                                backgroundColor: ['#ffc107', '#17a2b8', '#28a745']
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    };
+        // One request returns every widget's data for the shared filters
+        fetch('/api/widgets/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                widgets: widgets.map(w => ({ id: w.id, type: w.type })),
+                filters: filters
+            })
+        })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
                 }
-                
-                new Chart(ctx, chartConfig);
+                return response.json();
+            })
+            .then(result => {
+                widgets.forEach(widget => {
+                    const data = result.widgets[widget.id];
+                    if (!document.getElementById(`${widget.id}-content`)) {
+                        return;  // removed while the request was in flight
+                    }
+                    if (!data || data.error) {
+                        this.renderWidgetError(widget);
+                    } else if (this.isChartWidget(widget)) {
+                        this.renderChart(widget, data);
+                    } else {
+                        this.renderStat(widget, data);
+                    }
+                });
             })
             .catch(error => {
-                document.getElementById(`${widget.id}-content`).innerHTML = 
-                    '<div class="alert alert-danger">Failed to load data</div>';
+                widgets.forEach(widget => this.renderWidgetError(widget));
             });
     }
     
-    fetchWidgetData(widget, filters) {
-        const params = new URLSearchParams({...filters, type: widget.type});
+    isChartWidget(widget) {
+        return widget.type.includes('pie') || widget.type.includes('bar') || 
+            widget.type.includes('line') || widget.type.includes('area') ||
+            widget.type === 'reimbursement-breakdown';
+    }
+    
+    renderWidgetError(widget) {
+        const contentEl = document.getElementById(`${widget.id}-content`);
+        if (contentEl) {
+            contentEl.innerHTML = '<div class="alert alert-danger">Failed to load data</div>';
+        }
+    }
+    
+    renderChart(widget, data) {
+        const contentEl = document.getElementById(`${widget.id}-content`);
+        contentEl.innerHTML = `<canvas id="${widget.id}-chart"></canvas>`;
         
-        fetch(`/api/widgets/data?${params}`)
-            .then(response => response.json())
-            .then(data => {
-                const contentEl = document.getElementById(`${widget.id}-content`);
-                
-                if (widget.type === 'total-spent' || widget.type === 'reimbursable-amount') {
-                    contentEl.innerHTML = `
-                        <div class="text-center">
-                            <h2 class="text-primary">$${(data.value || 0).toFixed(2)}</h2>
-                        </div>
-                    `;
-                } else if (widget.type === 'pending-reimbursements') {
-                    contentEl.innerHTML = `
-                        <div class="text-center">
-                            <h3>${data.count || 0} Items</h3>
-                            <p class="text-muted">Total: $${(data.total || 0).toFixed(2)}</p>
-                        </div>
-                    `;
-                } else if (widget.type === 'expense-count') {
-                    fetch(`/api/expense_data?${new URLSearchParams(filters)}`)
-                        .then(r => r.json())
-                        .then(d => {
-                            contentEl.innerHTML = `
-                                <div class="text-center">
-                                    <h2 class="text-info">${d.expense_count || 0}</h2>
-                                </div>
-                            `;
-                        });
-                } else if (widget.type === 'avg-expense') {
-                    fetch(`/api/expense_data?${new URLSearchParams(filters)}`)
-                        .then(r => r.json())
-                        .then(d => {
-                            const avg = d.expense_count > 0 ? d.total_expenses / d.expense_count : 0;
-                            contentEl.innerHTML = `
-                                <div class="text-center">
-                                    <h2 class="text-warning">$${avg.toFixed(2)}</h2>
-                                </div>
-                            `;
-                        });
-                } else if (widget.type === 'recent-expenses') {
-                    let tableHtml = '<div class="table-responsive"><table class="table table-sm">';
-                    tableHtml += '<thead><tr><th>Title</th><th>Amount</th></tr></thead><tbody>';
-                    data.forEach(expense => {
-                        tableHtml += `<tr>
-                            <td>${expense.title}</td>
-                            <td>$${expense.amount.toFixed(2)}</td>
-                        </tr>`;
-                    });
-                    tableHtml += '</tbody></table></div>';
-                    contentEl.innerHTML = tableHtml;
-                } else if (widget.type === 'top-categories') {
-                    fetch(`/api/expense_data?${new URLSearchParams(filters)}`)
-                        .then(r => r.json())
-                        .then(d => {
-                            let tableHtml = '<div class="table-responsive"><table class="table table-sm">';
-                            tableHtml += '<thead><tr><th>Category</th><th>Amount</th></tr></thead><tbody>';
-                            
-                            const categories = d.categories.labels.map((label, i) => ({
-                                label: label,
-                                value: d.categories.data[i]
-                            })).sort((a, b) => b.value - a.value).slice(0, 5);
-                            
-                            categories.forEach(cat => {
-                                tableHtml += `<tr>
-                                    <td>${cat.label}</td>
-                                    <td>$${cat.value.toFixed(2)}</td>
-                                </tr>`;
-                            });
-                            tableHtml += '</tbody></table></div>';
-                            contentEl.innerHTML = tableHtml;
-                        });
+        const ctx = document.getElementById(`${widget.id}-chart`).getContext('2d');
+        let chartConfig = {};
+        
+        if (widget.type === 'category-pie' || widget.type === 'payment-pie') {
+            chartConfig = {
+                type: 'pie',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        data: data.data,
+                        backgroundColor: this.generateColors(data.labels.length)
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false
                 }
-            })
-            .catch(error => {
-                document.getElementById(`${widget.id}-content`).innerHTML = 
-                    '<div class="alert alert-danger">Failed to load data</div>';
+            };
+        } else if (widget.type === 'category-bar' || widget.type === 'payment-bar') {
+            chartConfig = {
+                type: 'bar',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        label: 'Amount',
+                        data: data.data,
+                        backgroundColor: widget.type === 'category-bar' ? '#0d6efd' : '#28a745'
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false
+                }
+            };
+        } else if (widget.type === 'trend-line' || widget.type === 'trend-area') {
+            const filled = widget.type === 'trend-area';
+            chartConfig = {
+                type: 'line',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        label: 'Daily Spending',
+                        data: data.data,
+                        borderColor: '#0d6efd',
+                        backgroundColor: filled ? 'rgba(13, 110, 253, 0.3)' : 'rgba(13, 110, 253, 0.1)',
+                        fill: filled,
+                        tension: 0.1
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false
+                }
+            };
+        } else if (widget.type === 'reimbursement-breakdown') {
+            chartConfig = {
+                type: 'doughnut',
+                data: {
+                    labels: ['Pending', 'Approved', 'Received'],
+                    datasets: [{
+                        data: [data.pending, data.approved, data.received],
+                        backgroundColor: ['#ffc107', '#17a2b8', '#28a745']
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false
+                }
+            };
+        }
+        
+        new Chart(ctx, chartConfig);
+    }
+    
+    renderStat(widget, data) {
+        const contentEl = document.getElementById(`${widget.id}-content`);
+        
+        if (widget.type === 'total-spent' || widget.type === 'reimbursable-amount') {
+            contentEl.innerHTML = `
+                <div class="text-center">
+                    <h2 class="text-primary">$${(data.value || 0).toFixed(2)}</h2>
+                </div>
+            `;
+        } else if (widget.type === 'pending-reimbursements') {
+            contentEl.innerHTML = `
+                <div class="text-center">
+                    <h3>${data.count || 0} Items</h3>
+                    <p class="text-muted">Total: $${(data.total || 0).toFixed(2)}</p>
+                </div>
+            `;
+        } else if (widget.type === 'expense-count') {
+            contentEl.innerHTML = `
+                <div class="text-center">
+                    <h2 class="text-info">${data.value || 0}</h2>
+                </div>
+            `;
+        } else if (widget.type === 'avg-expense') {
+            contentEl.innerHTML = `
+                <div class="text-center">
+                    <h2 class="text-warning">$${(data.value || 0).toFixed(2)}</h2>
+                </div>
+            `;
+        } else if (widget.type === 'recent-expenses') {
+            let tableHtml = '<div class="table-responsive"><table class="table table-sm">';
+            tableHtml += '<thead><tr><th>Title</th><th>Amount</th></tr></thead><tbody>';
+            data.forEach(expense => {
+                tableHtml += `<tr>
+                    <td>${expense.title}</td>
+                    <td>$${expense.amount.toFixed(2)}</td>
+                </tr>`;
             });
+            tableHtml += '</tbody></table></div>';
+            contentEl.innerHTML = tableHtml;
+        } else if (widget.type === 'top-categories') {
+            let tableHtml = '<div class="table-responsive"><table class="table table-sm">';
+            tableHtml += '<thead><tr><th>Category</th><th>Amount</th></tr></thead><tbody>';
+            data.labels.forEach((label, i) => {
+                tableHtml += `<tr>
+                    <td>${label}</td>
+                    <td>$${data.data[i].toFixed(2)}</td>
+                </tr>`;
+            });
+            tableHtml += '</tbody></table></div>';
+            contentEl.innerHTML = tableHtml;
+        }
     }
     
     removeWidget(widgetId) {
@@ -400,8 +353,7 @@ class DashboardBuilder {
     }
     
     updateFilters() {
-        this.getActiveFilters();
-        this.widgets.forEach(widget => this.updateWidgetData(widget));
+        this.refreshWidgets();
     }
     
     savePreset(name, isDefault) {
@@ -450,8 +402,9 @@ class DashboardBuilder {
                 // Load widgets
                 if (data.config && data.config.widgets) {
                     data.config.widgets.forEach(widget => {
-                        this.addWidget(widget.type, widget.title, widget.size);
+                        this.addWidget(widget.type, widget.title, widget.size, false);
                     });
+                    this.refreshWidgets();
                 }
             })
             .catch(error => {
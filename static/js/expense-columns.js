@@ -39,13 +39,17 @@
         localStorage.setItem('expenseTableColumns', JSON.stringify(columns));
     }
 
-    // Apply column visibility based on preferences
-    function applyColumnVisibility() {
+    // Apply column visibility based on preferences; pass rows to update only
+    // newly loaded rows instead of the whole table
+    function applyColumnVisibility(rows) {
         const columns = loadColumnPreferences();
         const table = document.getElementById('expenseTable');
         
         if (!table) return;
         
+        const targetRows = rows || table.querySelectorAll('tbody tr');
+        const headers = table.querySelectorAll('thead th');
+        
         // Hide/show columns based on preferences
         Object.keys(columns).forEach((columnKey, index) => {
             const column = columns[columnKey];
@@ -53,17 +57,15 @@
             
             if (columnIndex !== -1) {
                 // Apply to header
-                const headers = table.querySelectorAll('thead th');
-                if (headers[columnIndex]) {
+                if (!rows && headers[columnIndex]) {
                     headers[columnIndex].style.display = column.visible ? '' : 'none';
                 }
                 
-                // Apply to all rows
-                const rows = table.querySelectorAll('tbody tr');
-                rows.forEach(row => {
-                    const cells = row.querySelectorAll('td');
-                    if (cells[columnIndex]) {
-                        cells[columnIndex].style.display = column.visible ? '' : 'none';
+                // Apply to rows
+                targetRows.forEach(row => {
+                    const cell = row.cells[columnIndex];
+                    if (cell) {
+                        cell.style.display = column.visible ? '' : 'none';
                     }
                 });
             }
@@ -208,11 +208,11 @@
                                 </div>
                             ` : ''}
 
-                            ${expense.receipt_image ? `
+                            ${expense.receipt_thumbnail ? `
                                 <div class="expense-detail-group mb-3">
                                     <label class="fw-bold text-muted">Receipt Preview</label>
                                     <div class="text-center">
-                                        <img src="/expense/${expense.id}/receipt" 
+                                        <img src="${expense.receipt_thumbnail}" 
                                              class="img-thumbnail" 
                                              style="max-height: 200px; cursor: pointer;" 
                                              onclick="window.open('/expense/${expense.id}/receipt', '_blank')"
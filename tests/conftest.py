@@ -0,0 +1,57 @@
+"""Shared pytest setup.
+
+The application modules live at the repository root, so it is put on
+sys.path. The app keeps its database and caches in PCS_DATA_DIR, which is
+pointed at a temporary directory before ``app`` is first imported; the app
+then initializes a fresh, seeded database there on import, as a worker does.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_data_dir = tempfile.mkdtemp(prefix='pcs-tests-')
+os.environ['PCS_DATA_DIR'] = _data_dir
+os.environ.pop('PCS_DB_INITIALIZED', None)
+os.environ['CACHE_BACKEND'] = 'sqlite'
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def db(app_module):
+    """The app's database session inside an app context; expenses are removed afterwards"""
+    with app_module.app.app_context():
+        yield app_module.db
+        app_module.db.session.rollback()
+        app_module.Expense.query.delete()
+        app_module.db.session.commit()
+        app_module.clear_cache()
+
+
+@pytest.fixture
+def make_expenses(app_module, db):
+    """Insert expenses from keyword dicts and return their ids"""
+    def make(*rows):
+        expenses = [app_module.Expense(**row) for row in rows]
+        db.session.add_all(expenses)
+        db.session.commit()
+        return [expense.id for expense in expenses]
+    return make
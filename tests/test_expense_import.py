@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from expense_import import DEFAULT_TITLE, ImportFileError, map_names, prepare_frame, run_import  # noqa: E402
+
+CATEGORIES = {'Travel': 1, 'Food': 2}
+PAYMENT_METHODS = {'Cash': 1, 'Credit Card': 2}
+TODAY = date(2024, 6, 30)
+
+
+def frame(*rows, columns=('Date', 'Title', 'Category', 'Cost', 'Payment Method')):
+    return pd.DataFrame(list(rows), columns=list(columns), dtype=object)
+
+
+def test_map_names_is_case_insensitive():
+    ids, unknown = map_names(pd.Series([' food ', 'TRAVEL', 'Boats', None]), CATEGORIES)
+    
+    assert list(ids[:2]) == [2, 1]
+    assert list(unknown) == [False, False, True, False]
+
+
+def test_rows_are_mapped_to_columns():
+    records, errors, warnings = prepare_frame(frame(
+        ['2024-01-15', 'Moving truck', 'travel', '$1,299.50', 'credit card'],
+        ['01/16/2024', '', 'Food', '(12.00)', 'Cash'],
+        ['', 'Undated', '', '3', ''],
+    ), CATEGORIES, PAYMENT_METHODS, today=TODAY)
+    
+    assert errors == [] and warnings == []
+    assert [(r['date'], r['title'], r['category_id'], r['cost'], r['payment_method_id']) for r in records] == [
+        (date(2024, 1, 15), 'Moving truck', 1, 1299.5, 2),
+        (date(2024, 1, 16), DEFAULT_TITLE, 2, -12.0, 1),
+        (TODAY, 'Undated', None, 3.0, None),
+    ]
+
+
+def test_bad_dates_and_costs_reject_the_row():
+    records, errors, _ = prepare_frame(frame(
+        ['garbage', 'Bad date', 'Travel', '5', 'Cash'],
+        ['2024-02-01', 'Bad cost', 'Travel', 'abc', 'Cash'],
+        ['2024-02-02', 'Good', 'Travel', '5', 'Cash'],
+    ), CATEGORIES, PAYMENT_METHODS, today=TODAY)
+    
+    assert [record['title'] for record in records] == ['Good']
+    assert errors == [
+        (2, 'Date', 'garbage', 'Unrecognized date'),
+        (3, 'Cost', 'abc', 'Cost is missing or not a number'),
+    ]
+
+
+def test_unknown_names_are_imported_without_them_and_warned():
+    records, errors, warnings = prepare_frame(frame(
+        ['2024-02-02', 'Unknown names', 'Boats', '5', 'Barter'],
+        ['bad', 'Skipped anyway', 'Boats', '5', 'Cash'],
+    ), CATEGORIES, PAYMENT_METHODS, today=TODAY)
+    
+    assert [(r['title'], r['category_id'], r['payment_method_id']) for r in records] == [('Unknown names', None, None)]
+    assert [error[:2] for error in errors] == [(3, 'Date')]
+    assert [warning[:3] for warning in warnings] == [(2, 'Category', 'Boats'), (2, 'Payment Method', 'Barter')]
+
+
+def test_header_without_known_columns_is_an_error():
+    with pytest.raises(ImportFileError):
+        prepare_frame(frame(['1', '2'], columns=('foo', 'bar')), CATEGORIES, PAYMENT_METHODS)
+
+
+def test_run_import_reports_every_chunk():
+    inserted = []
+    chunks = [
+        frame(['2024-01-01', 'A', 'Food', '1', 'Cash'], ['x', 'B', 'Food', '1', 'Cash']),
+        frame(['2024-01-02', 'C', 'Boats', '2', 'Cash']).set_axis([2]),
+    ]
+    
+    report = run_import(chunks, CATEGORIES, PAYMENT_METHODS, inserted.extend)
+    
+    assert [record['title'] for record in inserted] == ['A', 'C']
+    assert (report.rows_parsed, report.rows_inserted, report.rows_rejected) == (3, 2, 1)
+    assert [error[0] for error in report.errors] == [3]
+    assert [warning[0] for warning in report.warnings] == [4]
+
+
+def test_only_import_jobs_report_progress(app_module):
+    with app_module.app.test_request_context():
+        import_job = app_module.BackgroundJob(id='a' * 32, kind='import', status='running',
+                                              bytes_total=200, bytes_read=50, rows_parsed=10)
+        report_job = app_module.BackgroundJob(id='b' * 32, kind='report', status='running')
+        
+        assert import_job.to_dict()['progress'] == 25.0
+        assert import_job.to_dict()['rows_parsed'] == 10
+        assert not {'progress', 'rows_parsed', 'rows_inserted', 'rows_rejected'} & set(report_job.to_dict())
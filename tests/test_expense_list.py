@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+
+
+def cursor_for(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.fixture
+def expenses(app_module, make_expenses):
+    # Enough rows for three pages, with ties on date, cost and title so that
+    # paging has to fall back to the later sort keys
+    count = 2 * app_module.EXPENSE_PAGE_SIZE + 7
+    return make_expenses(*(
+        dict(title=f'Expense {i % 7}', cost=float(i % 5), date=date(2024, 1 + i % 3, 1 + i % 2))
+        for i in range(count)
+    ))
+
+
+def page_through(client, sort):
+    ids, cursor = [], None
+    while True:
+        url = f'/api/expenses?sort={sort}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(int(part.split(',')[0]) for part in response.json['html'].split('showExpensePreview(')[1:])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('sort', ['date_desc', 'date_asc', 'amount_desc', 'amount_asc', 'title_asc'])
+def test_cursor_pages_cover_every_expense_once(client, expenses, sort):
+    ids = page_through(client, sort)
+    
+    assert sorted(ids) == sorted(expenses)
+    assert len(ids) == len(set(ids))
+
+
+def test_cursor_pages_keep_the_sort_order(app_module, client, expenses):
+    costs = {expense.id: expense.cost for expense in app_module.Expense.query}
+    
+    ids = page_through(client, 'amount_asc')
+    
+    assert ids == sorted(expenses, key=lambda expense_id: (costs[expense_id], expense_id))
+
+
+def test_cursor_round_trip(app_module):
+    keys = [1.5, 42]
+    with app_module.app.test_request_context():
+        assert app_module.decode_expense_cursor(app_module.encode_expense_cursor(keys), 'amount_asc') == keys
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    cursor_for({'a': 1}),
+    cursor_for([1, 2]),  # wrong length for the date sort
+    cursor_for([{'a': 1}, 1, 1]),
+    cursor_for(['2024-01-01', '2024-01-01 00:00:00', 'x']),
+    cursor_for(['2024-01-01', '2024-01-01 00:00:00', True]),
+    cursor_for(['2024-01-01', None, 1]),
+])
+def test_bad_cursor_is_rejected(client, cursor):
+    assert client.get(f'/api/expenses?cursor={cursor}').status_code == 400
+
+
+def test_cursor_from_another_sort_is_rejected(client):
+    assert client.get(f'/api/expenses?sort=amount_asc&cursor={cursor_for(["Title", 1])}').status_code == 400
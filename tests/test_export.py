@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/export?start_date=bad',
+    '/export?end_date=2024-13-01',
+    '/export?category_id=food',
+    '/export?min_amount=lots',
+    '/export.xlsx?start_date=bad',
+    '/export.xlsx?max_amount=x',
+])
+def test_export_rejects_malformed_filters(client, url):
+    assert client.get(url).status_code == 400
+
+
+def test_export_accepts_valid_filters(client):
+    response = client.get('/export?start_date=2024-01-01&category_id=all&min_amount=0')
+    assert response.status_code == 200
+    assert response.data.decode().startswith('Date,Title')
@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('matplotlib')
+pdf_utils = pytest.importorskip('pdf_utils')
+
+
+@pytest.fixture(autouse=True)
+def chart_cache():
+    return pdf_utils.configure_chart_cache()
+
+
+def test_chart_misses_render_on_the_executor(monkeypatch):
+    threads = set()
+    render_pie = pdf_utils._render_pie_chart
+    
+    def spy(*args):
+        threads.add(threading.current_thread().name)
+        return render_pie(*args)
+    monkeypatch.setattr(pdf_utils, '_render_pie_chart', spy)
+    charts = [
+        (pdf_utils.create_pie_chart, ({'Food': 10.0, 'Travel': 30.0}, 'Categories'), {}),
+        (pdf_utils.create_bar_chart, ({'Cash': 5.0}, 'Payments'), {'backend': 'vector'}),
+        (pdf_utils.create_pie_chart, ({}, 'Empty'), {}),
+    ]
+    
+    with ThreadPoolExecutor(2, thread_name_prefix='chart') as executor:
+        pending = pdf_utils.submit_charts(charts, executor)
+        results = pdf_utils.collect_charts(pending)
+    
+    assert [type(result).__name__ for result in results] == ['Image', 'Drawing', 'NoneType']
+    assert threads and all(name.startswith('chart') for name in threads)
+
+
+def test_rendered_charts_are_cached(chart_cache):
+    charts = [(pdf_utils.create_pie_chart, ({'Food': 10.0}, 'Categories'), {})]
+    
+    with ThreadPoolExecutor(1) as executor:
+        pdf_utils.render_charts(charts, executor)
+        second = pdf_utils.submit_charts(charts, executor)
+    
+    assert type(second[0]).__name__ == 'Image'
@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from result_cache import MemoryCacheBackend, RedisCacheBackend, ResultCache, SQLiteCacheBackend
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    return ResultCache(SQLiteCacheBackend(str(tmp_path / 'cache.db'), 100, 1024 * 1024), timeout=60)
+
+
+@pytest.fixture
+def cache():
+    fakeredis = pytest.importorskip('fakeredis')
+    return ResultCache(RedisCacheBackend(client=fakeredis.FakeRedis()), timeout=60)
+
+
+def test_sqlite_generation_bump_invalidates(sqlite_cache):
+    key = sqlite_cache.make_key('expense_data', 'period=all')
+    sqlite_cache.set(key, {'total': 1})
+    assert sqlite_cache.get(key) == {'total': 1}
+    
+    sqlite_cache.invalidate()
+    
+    assert sqlite_cache.generation() == 1
+    assert sqlite_cache.get(sqlite_cache.make_key('expense_data', 'period=all')) is None
+
+
+def test_sqlite_reads_do_not_take_the_write_lock(sqlite_cache, tmp_path):
+    key = sqlite_cache.make_key('expense_data', 'period=all')
+    sqlite_cache.set(key, [1])
+    writer = sqlite3.connect(str(tmp_path / 'cache.db'), isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert sqlite_cache.get(key) == [1]
+    finally:
+        writer.execute("ROLLBACK")
+    
+    counts = sqlite_cache.stats()['endpoints']['expense_data']
+    assert (counts['hits'], counts['sets']) == (1, 1)
+
+
+class BrokenBackend(MemoryCacheBackend):
+    def get(self, key, endpoint):
+        raise sqlite3.OperationalError('database is locked')
+    
+    def set(self, key, endpoint, generation, value, timeout):
+        raise sqlite3.OperationalError('database is locked')
+    
+    def purge(self):
+        raise sqlite3.OperationalError('database is locked')
+    
+    def stats(self):
+        raise sqlite3.OperationalError('database is locked')
+
+
+def test_failing_backend_is_a_miss():
+    cache = ResultCache(BrokenBackend(10, 1024), timeout=60)
+    key = cache.make_key('expense_data', 'period=all')
+    cache.set(key, {'total': 1})
+    assert cache.get(key) is None
+
+
+def test_failing_backend_stats_are_empty():
+    stats = ResultCache(BrokenBackend(10, 1024), timeout=60).stats()
+    assert (stats['backend'], stats['available'], stats['endpoints']) == ('memory', False, {})
+
+
+def test_cache_stats_endpoint(client):
+    response = client.get('/api/cache/stats')
+    assert response.status_code == 200
+    assert response.json['available'] is True
+
+
+def test_expense_writes_bump_the_generation(app_module, client, db):
+    generation = app_module.result_cache.generation()
+    before = client.get('/api/expense_data?period=year').json['total_expenses']
+    
+    response = client.post('/expense/new', data={'title': 'Movers', 'cost': '250', 'category_id': '0',
+                                                  'payment_method_id': '0', 'date': date.today().isoformat()})
+    assert response.status_code == 302
+    
+    assert app_module.result_cache.generation() > generation
+    assert client.get('/api/expense_data?period=year').json['total_expenses'] == before + 250
+
+
+def test_redis_get_and_set(cache):
+    key = cache.make_key('expense_data', 'period=all')
+    assert cache.get(key) is None
+    cache.set(key, {'total': 12.5})
+    assert cache.get(key) == {'total': 12.5}
+
+
+def test_redis_generation_bump_invalidates(cache):
+    key = cache.make_key('expense_data', 'period=all')
+    cache.set(key, {'total': 12.5})
+    generation = cache.generation()
+    
+    cache.invalidate()
+    
+    assert cache.generation() == generation + 1
+    new_key = cache.make_key('expense_data', 'period=all')
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_redis_stats_per_endpoint(cache):
+    key = cache.make_key('expense_data', 'period=all')
+    cache.get(key)
+    cache.set(key, [1, 2])
+    cache.get(key)
+    
+    counts = cache.stats()['endpoints']['expense_data']
+    assert (counts['hits'], counts['misses'], counts['sets']) == (1, 1, 1)
+    assert counts['hit_ratio'] == 0.5
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+# Rollup rows that do not match a GROUP BY over the expense table (in either direction)
+ROLLUP_MISMATCHES = """
+    SELECT COUNT(*) FROM (
+        SELECT * FROM (
+            SELECT date, category_id, payment_method_id, is_reimbursable, reimbursement_status,
+                   COUNT(*), ROUND(SUM(COALESCE(cost, 0)), 6)
+            FROM expense GROUP BY 1, 2, 3, 4, 5
+            EXCEPT
+            SELECT date, category_id, payment_method_id, is_reimbursable, reimbursement_status,
+                   expense_count, ROUND(total_cost, 6)
+            FROM expense_daily_rollup
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT date, category_id, payment_method_id, is_reimbursable, reimbursement_status,
+                   expense_count, ROUND(total_cost, 6)
+            FROM expense_daily_rollup
+            EXCEPT
+            SELECT date, category_id, payment_method_id, is_reimbursable, reimbursement_status,
+                   COUNT(*), ROUND(SUM(COALESCE(cost, 0)), 6)
+            FROM expense GROUP BY 1, 2, 3, 4, 5
+        )
+    )
+"""
+
+
+def mismatches(db):
+    return db.session.execute(db.text(ROLLUP_MISMATCHES)).scalar()
+
+
+@pytest.fixture
+def expenses(make_expenses):
+    return make_expenses(
+        dict(title='Hotel', cost=120.0, date=date(2024, 3, 1), category_id=1, payment_method_id=1),
+        dict(title='Fuel', cost=45.5, date=date(2024, 3, 1), category_id=1, payment_method_id=1),
+        dict(title='Lunch', cost=12.25, date=date(2024, 3, 2), category_id=2, is_reimbursable='yes',
+             reimbursement_status='pending'),
+        dict(title='No cost', cost=None, date=None),
+    )
+
+
+def test_rollup_after_insert(app_module, db, expenses):
+    assert mismatches(db) == 0
+    row = app_module.ExpenseDailyRollup.query.filter_by(date=date(2024, 3, 1), category_id=1).one()
+    assert (row.expense_count, row.total_cost) == (2, 165.5)
+
+
+def test_rollup_after_update(app_module, db, expenses):
+    hotel, fuel, lunch, _ = (db.session.get(app_module.Expense, expense_id) for expense_id in expenses)
+    hotel.cost = 100.0
+    fuel.date = date(2024, 3, 2)
+    lunch.reimbursement_status = 'received'
+    db.session.commit()
+    
+    assert mismatches(db) == 0
+
+
+def test_rollup_after_delete(app_module, db, expenses):
+    db.session.delete(db.session.get(app_module.Expense, expenses[0]))
+    db.session.commit()
+    assert mismatches(db) == 0
+    
+    app_module.Expense.query.delete()
+    db.session.commit()
+    assert app_module.ExpenseDailyRollup.query.count() == 0
+
+
+def test_missing_triggers_are_recreated(app_module, db, expenses):
+    db.session.execute(db.text("DROP TRIGGER expense_rollup_insert"))
+    db.session.commit()
+    db.session.add(app_module.Expense(title='Untracked', cost=9.0, date=date(2024, 3, 3)))
+    db.session.commit()
+    assert mismatches(db) > 0
+    
+    app_module.ensure_expense_rollup()
+    
+    triggers = db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars()
+    assert set(app_module.ROLLUP_TRIGGER_NAMES) <= set(triggers)
+    assert mismatches(db) == 0
@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from sqlite_profile import DEFAULT_PRAGMAS, apply_pragmas, effective_settings, pragmas_from_env, retry_on_locked
+
+
+def locked_error(message='database is locked'):
+    return OperationalError('INSERT INTO expense ...', {}, sqlite3.OperationalError(message))
+
+
+def test_pragmas_default_to_the_profile():
+    assert pragmas_from_env({}) == DEFAULT_PRAGMAS
+
+
+def test_pragmas_from_env_overrides():
+    pragmas = pragmas_from_env({'SQLITE_JOURNAL_MODE': 'delete', 'SQLITE_BUSY_TIMEOUT': '250',
+                                'SQLITE_SYNCHRONOUS': 'full'})
+    assert pragmas['journal_mode'] == 'DELETE'
+    assert pragmas['busy_timeout'] == 250
+    assert pragmas['synchronous'] == 'FULL'
+    assert pragmas['temp_store'] == 'MEMORY'
+
+
+@pytest.mark.parametrize('name, value', [('SQLITE_JOURNAL_MODE', 'sideways'), ('SQLITE_TEMP_STORE', 'disk')])
+def test_pragmas_from_env_rejects_unknown_values(name, value):
+    with pytest.raises(ValueError, match=name):
+        pragmas_from_env({name: value})
+
+
+def test_pragmas_from_env_rejects_non_numeric_sizes():
+    with pytest.raises(ValueError):
+        pragmas_from_env({'SQLITE_CACHE_SIZE': 'lots'})
+
+
+def test_applied_pragmas_are_in_effect(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / 'profile.db'))
+    try:
+        apply_pragmas(connection, DEFAULT_PRAGMAS)
+        assert effective_settings(connection) == DEFAULT_PRAGMAS
+    finally:
+        connection.close()
+
+
+def test_retry_on_locked_retries_until_success():
+    calls, rollbacks, rewinds = [], [], []
+    
+    @retry_on_locked(lambda: rollbacks.append(1), base_delay=0, before_retry=lambda: rewinds.append(1))
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise locked_error()
+        return 'saved'
+    
+    assert write() == 'saved'
+    assert (len(calls), len(rollbacks), len(rewinds)) == (3, 2, 2)
+
+
+def test_retry_on_locked_gives_up_after_the_last_attempt():
+    calls = []
+    
+    @retry_on_locked(lambda: None, attempts=4, base_delay=0)
+    def write():
+        calls.append(1)
+        raise locked_error()
+    
+    with pytest.raises(OperationalError, match='database is locked'):
+        write()
+    assert len(calls) == 4
+
+
+def test_retry_on_locked_reraises_other_errors_immediately():
+    calls, rollbacks = [], []
+    
+    @retry_on_locked(lambda: rollbacks.append(1), base_delay=0)
+    def write():
+        calls.append(1)
+        raise locked_error('no such table: expense')
+    
+    with pytest.raises(OperationalError, match='no such table'):
+        write()
+    assert (len(calls), len(rollbacks)) == (1, 0)
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [
+    ['total-spent'],
+    {'widgets': 'total-spent'},
+    {'widgets': ['total-spent', 3]},
+    {'widgets': [{'type': 'total-spent'}]},
+    {'widgets': [{'id': ['a'], 'type': 'total-spent'}]},
+    {'widgets': [{'id': 'a', 'type': 'total-spent'}], 'filters': ['period']},
+])
+def test_widget_batch_rejects_malformed_bodies(client, body):
+    response = client.post('/api/widgets/batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_widget_batch_answers_every_widget(client):
+    response = client.post('/api/widgets/batch', json={
+        'widgets': [
+            {'id': 'total', 'type': 'total-spent'},
+            {'id': 7, 'type': 'expense-count'},
+            {'id': 'odd', 'type': ['not', 'a', 'type']},
+        ],
+        'filters': {'period': 'year'},
+    })
+    
+    assert response.status_code == 200
+    widgets = response.json['widgets']
+    assert set(widgets) == {'total', '7', 'odd'}
+    assert 'value' in widgets['total']
+    assert widgets['odd'] == {'error': 'Unknown widget type'}